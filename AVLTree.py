@@ -1,8 +1,19 @@
+import os
 import time
+import functools
 import graphviz
 import subprocess
+from collections import namedtuple
+
+# validate every tree on construction only when debugging, switched on with e.g. VORONOI_DEBUG=1 in the environment
+DEBUG = os.environ.get("VORONOI_DEBUG", "0") not in ("", "0")
+
+# a problem found by AVLTree.validate: its kind ("height", "balance", "order" or "parent"), the offending node's value, and details
+Violation = namedtuple("Violation", ["kind", "value", "message"])
 
 class Node:
+    __slots__ = ("value", "parent", "left_child", "right_child", "height")
+
     def __init__(self, value):
         self.value = value
         self.parent = None
@@ -11,8 +22,13 @@ class Node:
         self.height = 0
 
 
+# the default ordering, which lets bulk construction fall back on a plain sort
+def less_than(x, y):
+    return x < y
+
+
 class AVLTree:
-    def __init__(self, value = None, values=[], comparison_fn=lambda x,y : x<y):
+    def __init__(self, value = None, values=None, comparison_fn=less_than, debug=None):
 
         # the comparison_fn needs to be injective, so that the inorder is well-defined
         self.comparison_fn = comparison_fn
@@ -20,16 +36,61 @@ class AVLTree:
         self.root = None
         self.height = 0
 
-        # initialise a root node
+        # initialise the tree from the given value(s) in one go, rather than inserting them one by one
+        values = [] if values is None else list(values)
+
         if value is not None:
-            self.root = Node(value)
-            self.height = 1
-        
-        for x in values:
-            self.insert(x)
+            values.append(value)
+
+        if values:
+            self.build(values)
         
-        self.validate()
+        # only pay for validation when asked to, either here or through the environment
+        if debug is None:
+            debug = DEBUG
+
+        if debug:
+            violations = self.validate()
+
+            if violations:
+                raise ValueError(f"invalid AVL tree, {len(violations)} violation(s), the first being {violations[0]}")
     
+    # replace the contents of the tree with a perfectly balanced tree holding the given values (dropping repeats)
+    # this is O(n) for values already in increasing order, and otherwise an O(n log n) sort comes first
+    def build(self, values):
+        values = list(values)
+        less = self.comparison_fn
+
+        if not all(less(a, b) for a, b in zip(values, values[1:])):
+            if less is less_than:
+                values.sort()
+            else:
+                values.sort(key=functools.cmp_to_key(lambda a, b : -1 if less(a, b) else (1 if less(b, a) else 0)))
+
+            # sorted, so any repeats are now adjacent
+            values = values[:1] + [b for a, b in zip(values, values[1:]) if less(a, b)]
+
+        nodes = [Node(value) for value in values]
+        self.root = self.__build_range(nodes, 0, len(nodes) - 1, None)
+        self.height = 1 + self.get_height(self.root)
+
+    # private method linking up nodes[lo..hi] into a balanced subtree (setting parents and heights as it goes), and returning its root
+    def __build_range(self, nodes, lo, hi, parent):
+
+        if lo > hi:
+            return None
+
+        mid = (lo + hi + 1) // 2
+        node = nodes[mid]
+        node.parent = parent
+        node.left_child = self.__build_range(nodes, lo, mid - 1, node)
+        node.right_child = self.__build_range(nodes, mid + 1, hi, node)
+
+        # the left half is never smaller than the right, so it is never shorter either
+        node.height = 1 + self.get_height(node.left_child)
+
+        return node
+
     # get the height of a given node (even if None)
     def get_height(self, node):
         if node == None:
@@ -40,36 +101,95 @@ class AVLTree:
     def balance_at(self, node):
         return self.get_height(node.left_child) - self.get_height(node.right_child)
 
-    # make sure this indeed satisfies the conditions of a balanced binary search tree
+    # check that this indeed satisfies the conditions of a balanced binary search tree, in a single O(n) post-order pass
+    # returns a list of Violations (empty if all is well), rather than stopping at the first problem
     def validate(self):
-        # TODO: this is very brute-force, refactor with some elegant recursion
-        nodes = self.list_tree()
+        violations = []
+
+        if self.root != None and self.root.parent != None:
+            violations.append(Violation("parent", self.root.value, "root has a parent"))
+
+        # (height, min value, max value) of each finished subtree, waiting to be picked up by its parent
+        results = []
+        stack = [(self.root, False)]
+
+        while stack:
+            node, children_done = stack.pop()
+
+            if node == None:
+                results.append(None)
+                continue
+
+            if not children_done:
+                stack.append((node, True))
+                stack.append((node.right_child, False))
+                stack.append((node.left_child, False))
+                continue
+
+            right = results.pop()
+            left = results.pop()
+            left_height = -1 if left == None else left[0]
+            right_height = -1 if right == None else right[0]
+            height = 1 + max(left_height, right_height)
+
+            if node.height != height:
+                violations.append(Violation("height", node.value, f"stored height {node.height}, actual height {height}"))
+
+            if abs(left_height - right_height) > 1:
+                violations.append(Violation("balance", node.value, f"balance {left_height - right_height}"))
+
+            if left != None and not self.comparison_fn(left[2], node.value):
+                violations.append(Violation("order", node.value, f"left subtree holds {left[2]}"))
+
+            if right != None and not self.comparison_fn(node.value, right[1]):
+                violations.append(Violation("order", node.value, f"right subtree holds {right[1]}"))
+
+            for child in (node.left_child, node.right_child):
+                if child != None and child.parent is not node:
+                    violations.append(Violation("parent", child.value, f"child of {node.value}, but its parent pointer disagrees"))
+
+            results.append((height,
+                            node.value if left == None else left[1],
+                            node.value if right == None else right[2]))
+
+        return violations
+
+    # lazily yields every node in the tree in order, optionally only those with values in [start, stop)
+    def iterate(self, start=None, stop=None):
+        return self.iterate_subtree(self.root, start, stop)
+
+    # lazily yields every node in the subtree starting at a specified node in order, optionally only those with values in [start, stop)
+    # uses an explicit stack rather than recursion, so deep trees can't hit the recursion limit
+    def iterate_subtree(self, node, start=None, stop=None):
+        stack = []
+
+        while stack or node != None:
+            if node != None:
+                # nodes below start, and their whole left subtrees, can be skipped
+                if start is not None and self.comparison_fn(node.value, start):
+                    node = node.right_child
+                    continue
+
+                stack.append(node)
+                node = node.left_child
+
+            else:
+                node = stack.pop()
+
+                # everything from here on is at least as big
+                if stop is not None and not self.comparison_fn(node.value, stop):
+                    return
+
+                yield node
+                node = node.right_child
 
-        for node in nodes:
-            assert abs(self.balance_at(node)) <= 1
-            
-            assert node.height == 1 + max(self.get_height(node.left_child), self.get_height(node.right_child))
-            
-            if node.right_child != None:
-                assert self.comparison_fn(node.value, self.subtree_min(node.right_child).value)
-            
-            if node.left_child != None:
-                assert self.comparison_fn(self.subtree_max(node.left_child).value, node.value)
-             
     # returns an inordered list of every node in the tree
     def list_tree(self):
         return self.list_subtree(self.root)
 
     # returns an inordered list of every node in the subtree starting at a specified node
     def list_subtree(self, node):
-        L = []
-
-        if node != None:
-            L += self.list_subtree(node.left_child)
-            L.append(node)
-            L += self.list_subtree(node.right_child)
-        
-        return L
+        return list(self.iterate_subtree(node))
 
     # returns a list of every ancestor of a given node, ordered in increasing height
     def list_ancestors(self, node):
@@ -83,10 +203,9 @@ class AVLTree:
     # generates a pdf file containing a plot of the tree, via the graphviz package
     def generate_plot(self, show=False):
         current_time = time.time()
-        nodes = self.list_tree()
         dot = graphviz.Digraph()
 
-        for node in nodes:
+        for node in self.iterate():
             dot.node(f"{node.value}")
 
             if node.left_child != None:
@@ -107,9 +226,7 @@ class AVLTree:
 
     # print value, parent value, and height for each node in the subtree starting at a given node (assuming printable values)
     def print_subtree(self, node):
-        L = self.list_subtree(node)
-
-        for l in L:
+        for l in self.iterate_subtree(node):
             if l is not self.root:
                 print("Node", l.value, "is the child of", l.parent.value, ", at height", l.height)
             else:
@@ -1,27 +1,43 @@
 import math
-import copy
 import time
-from matplotlib import pyplot as plt
+import numpy as np
 
 from FortuneTree import Node, FortuneTree
 from Point import Point
+import Predicates
 
 
 
 
 # encodes, and provides an interface for, parabolics arcs with fixed focus, and a variable (horizontal) directrix
 class Arc(Node):
-	def __init__(self, focus):
+	__slots__ = ("focus", "face", "left_halfedge", "right_halfedge", "event", "label", "breakpoint", "breakpoint_directrix")
+
+	def __init__(self, focus, face=-1):
 		super().__init__()
 
 		# geometric data
 		self.focus = focus
-		self.left_halfedge = None
-		self.right_halfedge = None
+		self.face = face
+		self.left_halfedge = -1
+		self.right_halfedge = -1
+
+		# the pending circle event (if any) in which this arc disappears
+		self.event = None
+
+		# the x value of the breakpoint with the next arc, as last worked out, and the directrix it was for (nan if none)
+		self.breakpoint = None
+		self.breakpoint_directrix = math.nan
 
 		# auxilliary data
 		self.label = 0
 
+	# a fresh arc for the right-hand piece left over when a new site splits this one, sharing only the focus and right half-edge
+	def Split(self):
+		right = Arc(self.focus, self.face)
+		right.right_halfedge = self.right_halfedge
+		return right
+
 	# produce a list of the coefficients for the associated quadratic function, given the current directrix y-value
 	def Coefficents(self, directrix):
 		a = 1 / (2 * (self.focus.y - directrix))
@@ -33,34 +49,98 @@ class Arc(Node):
 	def Evaluate(self, x, directrix):
 		return ((x - self.focus.x)**2 / (2 * (self.focus.y - directrix))) + ((self.focus.y + directrix) / 2)
 
-	# returns a list of all (real, internal) intersection points (in list form [x,y]) between two parabolic arcs
+	# the breakpoint with the next arc, as Breakpoint, remembered until the directrix moves or the next arc changes
+	def RightBreakpoint(self, directrix):
+		if self.breakpoint_directrix != directrix:
+			self.breakpoint = self.Breakpoint(self.next, directrix)
+			self.breakpoint_directrix = directrix
+
+		return self.breakpoint
+
+	# the x value of the breakpoint between this arc and another, to its right
 	def Breakpoint(self, other, directrix):
-		# get the coefficients and form a difference of quadratic functions
-		A = self.Coefficents(directrix)[0] - other.Coefficents(directrix)[0]
-		B = self.Coefficents(directrix)[1] - other.Coefficents(directrix)[1]
-		C = self.Coefficents(directrix)[2] - other.Coefficents(directrix)[2]
-		discriminant = B**2 - 4*A*C
-		x = None
+		x1, y1 = self.focus
+		x2, y2 = other.focus
 
-		if A == 0:
-			if B == 0: # the parabolae are vertical translations of one another, or are equal
-				assert C, "Intersected a parabola with itself"
-				x = None
+		# a focus sitting on the directrix gives a degenerate arc, i.e. a vertical ray up from the focus
+		if y1 == directrix:
+			if y2 == directrix: # neighbouring sites on the same row, split by their bisector
+				return (x1 + x2) / 2
+			return x1
 
-			else: # the parabolae are horizontal translations of one another, and have a single intersection
-				x = -C/B
+		if y2 == directrix:
+			return x2
 
-		else:
-			if discriminant == 0: # double root
-				x = -B / (2 * A)
+		# the parabolae are horizontal translations of one another, and have a single intersection
+		if y1 == y2:
+			assert x1 != x2, "Intersected a parabola with itself"
+			return (x1 + x2) / 2
+
+		# as in Breakpoints below, the discriminant is never negative, and the + root is written whichever way avoids cancellation
+		h1 = y1 - directrix
+		h2 = y2 - directrix
+		A = y2 - y1
+		b = h2 * x1 - h1 * x2
+		s = math.sqrt(h1 * h2 * ((x1 - x2)**2 + A**2))
+
+		if b >= 0:
+			return (b + s) / A
+
+		return (h2 * x1**2 - h1 * x2**2 - h1 * h2 * A) / (b - s)
+
+
+# vectorised Arc.Breakpoint for a whole beachline at once, given arrays of the foci of its arcs (in order) and the directrix
+# returns arrays of the x and y values of the len(focus_x) - 1 breakpoints between consecutive arcs
+def Breakpoints(focus_x, focus_y, directrix):
+	focus_x = np.asarray(focus_x, dtype=np.float64)
+	focus_y = np.asarray(focus_y, dtype=np.float64)
+
+	x1, y1 = focus_x[:-1], focus_y[:-1]
+	x2, y2 = focus_x[1:], focus_y[1:]
+	h1 = y1 - directrix
+	h2 = y2 - directrix
+
+	# scaling the difference of the two quadratics by 2*h1*h2 leaves A x^2 - 2 b x + C, whose discriminant
+	# b^2 - AC simplifies to h1 h2 |p1 - p2|^2, so it is never negative, and vanishes exactly when a focus is on the directrix
+	A = y2 - y1
+	b = h2 * x1 - h1 * x2
+	C = h2 * x1**2 - h1 * x2**2 + h1 * h2 * (y1 - y2)
+	s = np.sqrt(h1 * h2 * ((x1 - x2)**2 + (y1 - y2)**2))
+
+	with np.errstate(divide="ignore", invalid="ignore"):
+		# the + root, written whichever way avoids cancellation (the second form also covers A = 0)
+		x = np.where(b >= 0, (b + s) / A, C / (b - s))
+
+		# foci at equal heights meet on their bisector, as do two foci lying on the directrix
+		x = np.where(A == 0, (x1 + x2) / 2, x)
+
+		# evaluate on whichever parabola is further from degenerate
+		y = np.where(h1 >= h2,
+					 (x - x1)**2 / (2 * h1) + (y1 + directrix) / 2,
+					 (x - x2)**2 / (2 * h2) + (y2 + directrix) / 2)
+
+	return x, y
+
+
+# the lower envelope of the beachline, sampled at evenly spaced x values in [left_limit, right_limit), as arrays X and Y
+# every sample is matched to its arc with one binary search over the sorted breakpoints, and then evaluated in bulk
+def SampleEnvelope(focus_x, focus_y, directrix, left_limit, right_limit, samples=100):
+	focus_x = np.asarray(focus_x, dtype=np.float64)
+	focus_y = np.asarray(focus_y, dtype=np.float64)
+
+	X = left_limit + np.arange(samples) * ((right_limit - left_limit) / samples)
+
+	# arc i covers [breakpoint i-1, breakpoint i), just as in BeachLine.GetArcAbove
+	breakpoints, _ = Breakpoints(focus_x, focus_y, directrix)
+	arcs = np.searchsorted(breakpoints, X, side="right")
 
-			elif discriminant > 0: # distinct real roots, the correct one will be the + option
-				x = (-B + math.sqrt(discriminant))/(2*A)
+	fx = focus_x[arcs]
+	fy = focus_y[arcs]
 
-		if x == None:
-			return None
+	with np.errstate(divide="ignore", invalid="ignore"):
+		Y = (X - fx)**2 / (2 * (fy - directrix)) + (fy + directrix) / 2
 
-		return x
+	return X, Y
 
 
 # augments the above tree structure with application-specific methods
@@ -74,6 +154,16 @@ class BeachLine(FortuneTree):
 			self.arc_count = 1
 			root.label = 1
 
+	# drop every arc, ready for another sweep
+	def Clear(self):
+		self.root = None
+		self.arc_count = 0
+
+	# forget the breakpoint cached on an arc whose next neighbour has changed
+	def NextChanged(self, arc):
+		if arc != None:
+			arc.breakpoint_directrix = math.nan
+
 # find the arc on the beachfront immediately above a given point in the plane
 	def GetArcAbove(self, x, sweepline):
 		arc = self.root;
@@ -84,10 +174,10 @@ class BeachLine(FortuneTree):
 			right = math.inf
 
 			if arc.previous != None:
-				left = arc.previous.Breakpoint(arc, sweepline)
+				left = arc.previous.RightBreakpoint(sweepline)
 
 			if arc.next != None:
-				right = arc.Breakpoint(arc.next, sweepline)
+				right = arc.RightBreakpoint(sweepline)
 
 			if x < left:
 				arc = arc.left
@@ -95,15 +185,44 @@ class BeachLine(FortuneTree):
 				arc = arc.right
 			else:
 				found = True
-		
+
+		return self.CorrectArc(arc, x, sweepline)
+
+	# the breakpoints GetArcAbove descends by are rounded, and x may lie on the wrong side of one it is very close to, so the
+	# arc it finds is checked exactly, and moved along the beachline if need be
+	def CorrectArc(self, arc, x, sweepline):
+		while arc.previous != None and Predicates.BreakpointSide(x, arc.previous.focus, arc.focus, sweepline) < 0:
+			arc = arc.previous
+
+		while arc.next != None and Predicates.BreakpointSide(x, arc.focus, arc.next.focus, sweepline) >= 0:
+			arc = arc.next
+
 		return arc
 
+	# add a new site's arc to the beachline, returning the arc it lands under and the right-hand piece split off from that
+	# one; the first arc has nothing above it, and an arc level with the one above it (as along the top row of sites)
+	# goes in to its right, with nothing split off, so the missing pieces come back as None
 	def AddArc(self, arc):
+		if self.root == None:
+			self.root = arc
+			self.arc_count = 1
+			arc.label = 1
+			return None, None
+
+		above = self.GetArcAbove(arc.focus.x, arc.focus.y)
+
+		if above.focus.y == arc.focus.y:
+			self.InsertAfter(above, arc)
+			self.arc_count += 1
+			arc.label = self.arc_count
+			return above, None
 
-		left = self.GetArcAbove(arc.focus.x, arc.focus.y)
-		right = copy.deepcopy(left)
+		return above, self.SplitArc(above, arc)
 
-		# TODO: initialise each arc's voronoi graph data
+	# split an existing arc in two, with a new arc in between, returning the right-hand piece
+	def SplitArc(self, left, arc):
+
+		right = left.Split()
 
 		self.InsertAfter(left, arc)
 		arc.label = self.arc_count + 1
@@ -113,36 +232,43 @@ class BeachLine(FortuneTree):
 		right.label = self.arc_count + 1
 		self.arc_count +=1
 
-	def ListBreakpoints(self, sweepline):
-		arc = self.Min()
-		points = []
+		return right
 
-		while arc.next != None:
-			x = arc.Breakpoint(arc.next, sweepline)
-			y = arc.Evaluate(x, sweepline)
-			points.append(Point(x,y))
-			arc = arc.next
+	# arrays of the x and y values of the foci of each arc, from left to right
+	def FocusArrays(self):
+		X = np.fromiter((arc.focus.x for arc in self.Iterate()), dtype=np.float64)
+		Y = np.fromiter((arc.focus.y for arc in self.Iterate()), dtype=np.float64)
+		return X, Y
+
+	# all breakpoints of the beachline at once, as arrays of x and y values
+	def Breakpoints(self, sweepline):
+		focus_x, focus_y = self.FocusArrays()
+
+		if len(focus_x) < 2:
+			return np.empty(0), np.empty(0)
 
-		return points
+		return Breakpoints(focus_x, focus_y, sweepline)
+
+	def ListBreakpoints(self, sweepline):
+		X, Y = self.Breakpoints(sweepline)
+		return [Point(x, y) for x, y in zip(X.tolist(), Y.tolist())]
+
+	# sample the beachline, as in SampleEnvelope, returning arrays X and Y (no plotting, so no need for matplotlib)
+	def SampleEnvelope(self, sweepline, left_limit, right_limit, samples=100):
+		focus_x, focus_y = self.FocusArrays()
+		return SampleEnvelope(focus_x, focus_y, sweepline, left_limit, right_limit, samples)
 
 	def PlotEnvelope(self, sweepline, left_limit, right_limit, samples=100, show=True, save=False, sites=False):
-		
-		X, Y = [], []
-
-		for i in range(samples):
-			xi = left_limit + i * (right_limit - left_limit) / samples
-			arc = self.GetArcAbove(xi, sweepline)
-			yi = arc.Evaluate(xi, sweepline)
-			X.append(xi)
-			Y.append(yi)
+		from matplotlib import pyplot as plt
+
+		X, Y = self.SampleEnvelope(sweepline, left_limit, right_limit, samples)
 		
 		plt.plot(X, Y)
 
 		if sites:
-			arcs = self.ListNodes()
-			siteX = [arc.focus.x for arc in arcs]
-			siteY = [arc.focus.y for arc in arcs]
-			plt.scatter(list(siteX), list(siteY))
+			siteX = [arc.focus.x for arc in self.Iterate()]
+			siteY = [arc.focus.y for arc in self.Iterate()]
+			plt.scatter(siteX, siteY)
 		
 		if save: plt.savefig("pyplot_outputs/envelope.png")
 		if show: plt.show()
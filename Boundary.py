@@ -1,12 +1,353 @@
+import abc
+import math
+import numpy as np
 
-class Boundary:
-	# TODO
-	pass
+# vertices closer to the boundary than this (as a fraction of its length) are taken to be on it, when clipping
+EPSILON = 1e-9
 
-class RectangularBoundary:
-	# TODO
-	pass
+# a region of the plane, which sites can be generated inside of
+# subclasses must implement everything below but Clip, which is built on the rest (as SiteGenerator is on Sample,
+# Contains, BoundingBox and Area)
+class Boundary(abc.ABC):
+	# n points drawn uniformly at random from inside the region, as an (n, 2) float64 array, using a numpy Generator
+	@abc.abstractmethod
+	def Sample(self, rng, n):
+		pass
 
-class CircularBoundary:
-	# TODO
-	pass
\ No newline at end of file
+	# whether each row of an (n, 2) array of points lies inside the region (boundary included)
+	@abc.abstractmethod
+	def Contains(self, points):
+		pass
+
+	# the same, but excluding the boundary, and anything closer to it than margin
+	@abc.abstractmethod
+	def Interior(self, points, margin=0.0):
+		pass
+
+	# the smallest axis-aligned box around the region, as (left, bottom, right, top)
+	@abc.abstractmethod
+	def BoundingBox(self):
+		pass
+
+	@abc.abstractmethod
+	def Area(self):
+		pass
+
+	# where each line start + t * direction (rows of two (n, 2) arrays) enters and leaves the region, as arrays of
+	# t values (t_in, t_out), with t_in > t_out wherever the line misses it
+	@abc.abstractmethod
+	def Intersect(self, start, direction):
+		pass
+
+	# how far round the edge of the region (counterclockwise, from some fixed point on it) each point on the edge is
+	@abc.abstractmethod
+	def Perimeter(self, points):
+		pass
+
+	@abc.abstractmethod
+	def PerimeterLength(self):
+		pass
+
+	# the vertices of the polygon that the region is closed off with when clipping, as an array of their Perimeter values
+	# (increasing) and an array of their coordinates
+	@abc.abstractmethod
+	def Corners(self):
+		pass
+
+	# clip a finished VoronoiDiagram to the region, in place: edges are cut where they leave it (and dropped if they miss it
+	# altogether), and every face reaching the edge of the region is closed off along it, by new half-edges whose twins
+	# lie outside (face -1, running clockwise round the region); faces whose cells miss the region are left empty
+	# it all runs as whole-array operations, and leaves the diagram's arrays compacted (reusing their storage)
+	def Clip(self, G):
+		# squeeze out any gaps left by removing sites from the diagram first
+		if G.free_vertices or G.free_halfedges:
+			G.Compact()
+
+		vertex_xy = G.Vertices()
+		origin, twin, next, prev, face = G.Halfedges()
+		site_xy = G.site_xy
+
+		# edge e is the pair of half-edges (2e, 2e+1), with 2e running from vertex A to vertex B (either of which may be
+		# missing, at infinity); an extra row on the end of the vertex arrays is what a missing (-1) vertex picks up
+		# vertices on the boundary (or within rounding error of it) count as outside, so that the edges from them in across
+		# the region all cross the boundary right there, and the edges along it or out from it are dropped
+		margin = EPSILON * self.PerimeterLength()
+		A = origin[0::2]
+		B = origin[1::2]
+		inside = np.append(self.Interior(vertex_xy, margin), False)
+		padded_xy = np.append(vertex_xy, [[np.nan, np.nan]], axis=0)
+		a_xy = padded_xy[A]
+		b_xy = padded_xy[B]
+		a_inside = inside[A]
+		b_inside = inside[B]
+
+		# 2e runs counterclockwise round the face of site p, so along the bisector with q's site, p to its left
+		p = site_xy[face[0::2]]
+		q = site_xy[face[1::2]]
+
+		# the line through each edge, as start + t * step, with the edge itself covering t_a <= t <= t_b (stepping along the
+		# bisector, rather than from one end to the other, keeps very short edges pointing the right way)
+		finite_a = A >= 0
+		finite_b = B >= 0
+		start = np.where(finite_a[:, None], a_xy, np.where(finite_b[:, None], b_xy, (p + q) / 2))
+		step = np.stack([p[:, 1] - q[:, 1], q[:, 0] - p[:, 0]], axis=1)
+		t_a = np.where(finite_a, 0.0, -np.inf)
+		t_b = np.where(finite_b, ((b_xy - start) * step).sum(axis=1) / (step**2).sum(axis=1), np.inf)
+		t_in, t_out = self.Intersect(start, step)
+
+		# what is left of each edge runs from t_lo to t_hi, and it survives if either end is inside, or if it passes
+		# through the inside of the region
+		t_lo = np.where(a_inside, t_a, np.maximum(t_a, t_in))
+		t_hi = np.where(b_inside, t_b, np.minimum(t_b, t_out))
+		with np.errstate(invalid="ignore"):
+			midpoint = start + (t_lo + t_hi)[:, None] / 2 * step
+			keep = a_inside | b_inside | ((t_lo < t_hi) & self.Interior(midpoint, margin))
+		edges = np.nonzero(keep)[0]
+		edge_count = len(edges)
+
+		# renumber the vertices inside, and the surviving half-edges (keeping twins together)
+		vertex_map = np.cumsum(inside) - 1
+		inside_count = int(inside.sum())
+		halfedge_map = np.full(len(origin), -1)
+		halfedge_map[2 * edges] = 2 * np.arange(edge_count)
+		halfedge_map[2 * edges + 1] = 2 * np.arange(edge_count) + 1
+
+		new_origin = np.empty(2 * edge_count, dtype=np.int64)
+		new_origin[0::2] = vertex_map[A[edges]]
+		new_origin[1::2] = vertex_map[B[edges]]
+		new_face = np.empty(2 * edge_count, dtype=np.int64)
+		new_face[0::2] = face[2 * edges]
+		new_face[1::2] = face[2 * edges + 1]
+
+		# the points where surviving edges cross the edge of the region, each with the half-edge running out through it
+		# and its twin running back in, in counterclockwise order round the region
+		exits = edges[~b_inside[edges]]
+		entries = edges[~a_inside[edges]]
+		crossings = np.concatenate([start[exits] + t_hi[exits, None] * step[exits],
+									start[entries] + t_lo[entries, None] * step[entries]])
+		outgoing = np.concatenate([halfedge_map[2 * exits], halfedge_map[2 * entries + 1]])
+		inward = np.concatenate([-step[exits], step[entries]])
+
+		# several edges can cross at the same point (a vertex on the boundary), and these are taken in the order in which
+		# they head away from the boundary, found from where a point a short way in along each sits relative to the rest
+		perimeter = self.Perimeter(crossings)
+		length = self.PerimeterLength()
+		nudge = 1e3 * margin * inward / np.hypot(inward[:, 0], inward[:, 1])[:, None]
+		heading = (self.Perimeter(crossings + nudge) - perimeter + length / 2) % length
+
+		order = np.lexsort([heading, np.floor(perimeter / margin)])
+		crossings, outgoing, perimeter = crossings[order], outgoing[order], perimeter[order]
+		incoming = outgoing ^ 1
+		crossing_count = len(crossings)
+		new_origin[incoming] = inside_count + np.arange(crossing_count)
+
+		# half-edges ending inside keep their successors
+		ending_inside = np.concatenate([2 * edges[b_inside[edges]], 2 * edges[a_inside[edges]] + 1])
+		new_next = np.full(2 * edge_count, -1, dtype=np.int64)
+		new_next[halfedge_map[ending_inside]] = halfedge_map[next[ending_inside]]
+
+		# going counterclockwise round the region, the stretch from one crossing to the next belongs to the face of the
+		# half-edge leaving through the first, and runs by way of any corners in between to the half-edge coming back
+		# in through the second; with no crossings at all, the region lies inside a single cell, and its face gets the
+		# whole polygon (that of the site nearest any point on it)
+		corner_perimeter, corner_xy = self.Corners()
+		corner_count = len(corner_perimeter)
+
+		if crossing_count > 0:
+			following = np.append(perimeter[1:], perimeter[0] + length)
+			wrapped = np.concatenate([corner_perimeter, corner_perimeter + length])
+			first = np.searchsorted(wrapped, perimeter + margin, side="right")
+			between = np.maximum(np.searchsorted(wrapped, following - margin, side="left") - first, 0)
+			stretch_face = new_face[outgoing]
+		elif (~np.isnan(site_xy[:, 0])).any():
+			first = np.zeros(1, dtype=np.int64)
+			between = np.array([corner_count])
+			nearest = np.nanargmin(((site_xy - corner_xy[0])**2).sum(axis=1))
+			stretch_face = np.array([nearest])
+		else:
+			first = between = stretch_face = np.zeros(0, dtype=np.int64)
+
+		# each stretch is a chain of between + 1 segments (or just between, for a whole polygon), with the corners'
+		# new vertices numbered after the crossings'
+		segments = between + (crossing_count > 0)
+		segment_count = segments.sum()
+		stretch = np.repeat(np.arange(len(segments)), segments)
+		position = np.arange(segment_count) - np.repeat(np.cumsum(segments) - segments, segments)
+		corner_offset = np.cumsum(between) - between
+		corners = (np.repeat(first - corner_offset, between) + np.arange(between.sum())) % corner_count
+		corner_base = inside_count + crossing_count + corner_offset[stretch]
+
+		if crossing_count > 0:
+			segment_origin = np.where(position == 0, inside_count + stretch, corner_base + position - 1)
+			segment_destination = np.where(position == between[stretch], inside_count + (stretch + 1) % crossing_count, corner_base + position)
+		else:
+			segment_origin = corner_base + position
+			segment_destination = corner_base + (position + 1) % corner_count
+
+		# the segments' half-edges come after the surviving ones, each inside the region followed by its twin outside
+		inner = 2 * edge_count + 2 * np.arange(segment_count)
+		outer = inner + 1
+		halfedge_count = 2 * edge_count + 2 * segment_count
+
+		vertex_xy = np.concatenate([vertex_xy[inside[:-1]], crossings, corner_xy[corners]])
+
+		origin = np.empty(halfedge_count, dtype=np.int64)
+		origin[:2 * edge_count] = new_origin
+		origin[inner] = segment_origin
+		origin[outer] = segment_destination
+
+		face = np.full(halfedge_count, -1, dtype=np.int64)
+		face[:2 * edge_count] = new_face
+		face[inner] = stretch_face[stretch]
+
+		next = np.full(halfedge_count, -1, dtype=np.int64)
+		next[:2 * edge_count] = new_next
+		last = position == segments[stretch] - 1
+
+		if crossing_count > 0:
+			next[outgoing] = inner[position == 0]
+			next[inner] = np.where(last, incoming[(stretch + 1) % crossing_count], inner + 2)
+		else:
+			next[inner] = np.where(last, 2 * edge_count, inner + 2)
+
+		# the outer half-edges run clockwise, each followed by the one before it
+		next[outer] = np.roll(outer, 1)
+
+		prev = np.full(halfedge_count, -1, dtype=np.int64)
+		linked = np.nonzero(next >= 0)[0]
+		prev[next[linked]] = linked
+
+		G.Replace(vertex_xy, origin, next, prev, face)
+
+class RectangularBoundary(Boundary):
+	def __init__(self, left=0.0, bottom=0.0, right=1.0, top=1.0):
+		assert left < right and bottom < top, "empty rectangle"
+		self.left = left
+		self.bottom = bottom
+		self.right = right
+		self.top = top
+
+	def Sample(self, rng, n):
+		points = rng.random((n, 2))
+		points *= (self.right - self.left, self.top - self.bottom)
+		points += (self.left, self.bottom)
+		return points
+
+	def Contains(self, points):
+		x, y = points[:, 0], points[:, 1]
+		return (self.left <= x) & (x <= self.right) & (self.bottom <= y) & (y <= self.top)
+
+	def Interior(self, points, margin=0.0):
+		x, y = points[:, 0], points[:, 1]
+		return (self.left + margin < x) & (x < self.right - margin) & (self.bottom + margin < y) & (y < self.top - margin)
+
+	def BoundingBox(self):
+		return self.left, self.bottom, self.right, self.top
+
+	def Area(self):
+		return (self.right - self.left) * (self.top - self.bottom)
+
+	# liang-barsky: each pair of opposite sides bounds t to the interval between the lines crossing them
+	def Intersect(self, start, direction):
+		t_in = np.full(len(start), -np.inf)
+		t_out = np.full(len(start), np.inf)
+
+		for axis, low, high in ((0, self.left, self.right), (1, self.bottom, self.top)):
+			s = start[:, axis]
+			d = direction[:, axis]
+
+			with np.errstate(divide="ignore", invalid="ignore"):
+				t_low = (low - s) / d
+				t_high = (high - s) / d
+
+			# a line parallel to these sides is either between them all along, or never
+			parallel = d == 0
+			between = (low < s) & (s < high)
+			t_in = np.maximum(t_in, np.where(parallel, np.where(between, -np.inf, np.inf), np.minimum(t_low, t_high)))
+			t_out = np.minimum(t_out, np.where(parallel, np.where(between, np.inf, -np.inf), np.maximum(t_low, t_high)))
+
+		return t_in, t_out
+
+	# measured from the bottom left corner, by whichever side each point is nearest to
+	def Perimeter(self, points):
+		x, y = points[:, 0], points[:, 1]
+		width = self.right - self.left
+		height = self.top - self.bottom
+
+		side = np.argmin([np.abs(y - self.bottom), np.abs(x - self.right), np.abs(y - self.top), np.abs(x - self.left)], axis=0)
+		along = np.choose(side, [x - self.left, y - self.bottom, self.right - x, self.top - y])
+		along = np.clip(along, 0, np.choose(side, [width, height, width, height]))
+		return np.choose(side, [0, width, width + height, 2 * width + height]) + along
+
+	def PerimeterLength(self):
+		return 2 * (self.right - self.left + self.top - self.bottom)
+
+	def Corners(self):
+		width = self.right - self.left
+		height = self.top - self.bottom
+		perimeter = np.array([0, width, width + height, 2 * width + height])
+		corners = np.array([(self.left, self.bottom), (self.right, self.bottom), (self.right, self.top), (self.left, self.top)])
+		return perimeter, corners
+
+# when clipping, the circle is closed off with a regular polygon of the given number of sides
+class CircularBoundary(Boundary):
+	def __init__(self, x=0.0, y=0.0, radius=1.0, resolution=256):
+		assert radius > 0, "empty circle"
+		assert resolution >= 3, "too few sides to close off the circle"
+		self.x = x
+		self.y = y
+		self.radius = radius
+		self.resolution = resolution
+
+	def Sample(self, rng, n):
+		# square-rooting the radial coordinate makes the points uniform by area
+		points = rng.random((n, 2))
+		r = self.radius * np.sqrt(points[:, 0])
+		theta = 2 * math.pi * points[:, 1]
+		points[:, 0] = self.x + r * np.cos(theta)
+		points[:, 1] = self.y + r * np.sin(theta)
+		return points
+
+	def Contains(self, points):
+		return (points[:, 0] - self.x)**2 + (points[:, 1] - self.y)**2 <= self.radius**2
+
+	def Interior(self, points, margin=0.0):
+		return (points[:, 0] - self.x)**2 + (points[:, 1] - self.y)**2 < (self.radius - margin)**2
+
+	def BoundingBox(self):
+		return self.x - self.radius, self.y - self.radius, self.x + self.radius, self.y + self.radius
+
+	def Area(self):
+		return math.pi * self.radius**2
+
+	# solving |start + t * direction - centre|^2 = radius^2, taking the roots in the form that avoids cancellation
+	def Intersect(self, start, direction):
+		offset_x = start[:, 0] - self.x
+		offset_y = start[:, 1] - self.y
+		a = direction[:, 0]**2 + direction[:, 1]**2
+		b = direction[:, 0] * offset_x + direction[:, 1] * offset_y
+		c = offset_x**2 + offset_y**2 - self.radius**2
+		discriminant = b**2 - a * c
+
+		with np.errstate(divide="ignore", invalid="ignore"):
+			q = -(b + np.copysign(np.sqrt(np.maximum(discriminant, 0)), b))
+			t1 = q / a
+			t2 = c / q
+
+		# lines missing the circle altogether
+		t_in = np.where(discriminant < 0, np.inf, np.minimum(t1, t2))
+		t_out = np.where(discriminant < 0, -np.inf, np.maximum(t1, t2))
+		return t_in, t_out
+
+	# arc length, counterclockwise from the rightmost point
+	def Perimeter(self, points):
+		angle = np.arctan2(points[:, 1] - self.y, points[:, 0] - self.x) % (2 * math.pi)
+		return self.radius * angle
+
+	def PerimeterLength(self):
+		return 2 * math.pi * self.radius
+
+	def Corners(self):
+		angle = 2 * math.pi * np.arange(self.resolution) / self.resolution
+		corners = np.stack([self.x + self.radius * np.cos(angle), self.y + self.radius * np.sin(angle)], axis=1)
+		return self.radius * angle, corners
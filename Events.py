@@ -1,15 +1,47 @@
+from collections import namedtuple
 
-# TODO: figure out what data each holds
+# events are queued by the sweepline position (y) at which they fire, with x as a tie-break
+# cancelled events have valid set to False and are skipped by the queue, rather than being dug out of it
 
 class SiteEvent:
-	def __init__(self, site):
+	__slots__ = ("site", "face", "x", "y", "valid")
+
+	def __init__(self, site, face=-1):
+		# the site, and the id of its face in the voronoi diagram
 		self.site = site
+		self.face = face
+		self.x = site.x
+		self.y = site.y
+		self.valid = True
 		return
 
+	# move the event to a new site (keeping its face), for another sweep
+	def Move(self, site):
+		self.site = site
+		self.x = site.x
+		self.y = site.y
+		self.valid = True
+
 
 
 class CircleEvent:
-	def __init__(self):
+	__slots__ = ("arc", "center", "x", "y", "valid")
+
+	def __init__(self, arc, center, y):
+		# the arc which disappears, and the voronoi vertex it leaves behind
+		self.arc = arc
+		self.center = center
+
+		# the sweepline fires this event on reaching the bottom of the circle
+		self.x = center.x
+		self.y = y
+		self.valid = True
 		return
 
 
+
+# what handling an event did, as streamed by FortunesAlgorithm.Stream(): its kind ("site" or "circle") and sweepline
+# position y, the faces of the arcs involved (the arc a site event split and its new one, or a circle event's vanishing
+# arc and its neighbours, left to right), and the ranges of vertex and half-edge ids it added to the diagram
+class SweepRecord(namedtuple("SweepRecord", ["kind", "y", "arcs", "vertices", "halfedges"])):
+	__slots__ = ()
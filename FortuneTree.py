@@ -4,6 +4,8 @@ import graphviz
 DEFAULT = object()
 
 class Node:
+	__slots__ = ("data", "parent", "left", "right", "previous", "next", "height")
+
 	def __init__(self, data=None):
 		self.data = data
 		self.parent = None
@@ -82,7 +84,8 @@ class FortuneTree:
 
 	def Rebalance(self, node, balance):
 
-		root = (node == self.root)
+		parent = node.parent
+		original = node
 
 		if balance > 1:
 			# left-heavy
@@ -108,11 +111,31 @@ class FortuneTree:
 				# do left rotation
 				node = self.RotateLeft(node)
 
-		if root:
+		# hang the rotated subtree back where the original node used to be
+		if parent == None:
 			self.root = node
+		elif parent.left == original:
+			parent.left = node
+		else:
+			parent.right = node
 
 		return node
 
+	# walk from a modified node up to the root, fixing heights and rebalancing along the way (O(log n))
+	def Retrace(self, node):
+
+		while node != None:
+			node.height = self.RecalculateHeight(node)
+			balance = self.GetBalance(node)
+
+			if abs(balance) > 1:
+				node = self.Rebalance(node, balance)
+
+			node = node.parent
+
+		return
+
+	# rebalances the entire subtree, O(n) so only useful as a repair tool; updates should use Retrace
 	def FixTree(self, node = DEFAULT):
 
 		if node == DEFAULT:
@@ -186,6 +209,11 @@ class FortuneTree:
 
 		return None
 
+	# called whenever a node's next neighbour changes (by insertion or deletion), for subclasses keeping anything that
+	# depends on it; node may be None, when the change is at the front of the list
+	def NextChanged(self, node):
+		return
+
 	def InsertBefore(self, node, newnode):
 
 		if node.left == None:
@@ -197,7 +225,7 @@ class FortuneTree:
 			pred.right = newnode
 			newnode.parent = pred
 
-		self.root = self.FixTree()
+		self.Retrace(newnode.parent)
 
 		newnode.previous = node.previous
 		newnode.next = node
@@ -207,6 +235,9 @@ class FortuneTree:
 
 		node.previous = newnode
 
+		self.NextChanged(newnode.previous)
+		self.NextChanged(newnode)
+
 		return
 
 	def InsertAfter(self, node, newnode):
@@ -220,7 +251,7 @@ class FortuneTree:
 			succ.left = newnode
 			newnode.parent = succ
 
-		self.root = self.FixTree()
+		self.Retrace(newnode.parent)
 
 		newnode.next = node.next
 		newnode.previous = node
@@ -230,6 +261,9 @@ class FortuneTree:
 
 		node.next = newnode
 
+		self.NextChanged(node)
+		self.NextChanged(newnode)
+
 		return
 
 	def Replace(self, node, replacement):
@@ -248,6 +282,9 @@ class FortuneTree:
 
 	def Delete(self, node):
 
+		# the deepest node whose subtree changed shape, from which we retrace to the root
+		lowest = node.parent
+
 		if node.left == None:
 			replacement = node.right
 			self.Replace(node, node.right)
@@ -260,9 +297,12 @@ class FortuneTree:
 			replacement = node.next
 
 			if replacement.parent != node:
+				lowest = replacement.parent
 				self.Replace(replacement, replacement.right)
 				replacement.right = node.right
 				node.right.parent = replacement
+			else:
+				lowest = replacement
 
 			self.Replace(node, replacement)
 			replacement.left = node.left
@@ -273,26 +313,34 @@ class FortuneTree:
 		if node.next != None:
 			node.next.previous = node.previous
 
+		self.NextChanged(node.previous)
 		node = None
-		self.root = self.FixTree()
+		self.Retrace(lowest)
 
 		return replacement
 
+	# lazily walks the nodes in order, following the next links from start (by default the first node) up to, but not including, stop
+	def Iterate(self, start=DEFAULT, stop=None):
+
+		if start == DEFAULT:
+			start = None if self.root == None else self.Min()
+
+		node = start
+
+		while node != None and node != stop:
+			yield node
+			node = node.next
+
+	# an inordered list of the nodes in the subtree at a given node (by default the whole tree)
 	def ListNodes(self, node=DEFAULT):
 
 		if node == None:
 			return []
 
 		if node == DEFAULT:
-			node = self.root
-
-		nodes = []
-
-		nodes = nodes + self.ListNodes(node.left)
-		nodes.append(node)
-		nodes = nodes + self.ListNodes(node.right)
+			return list(self.Iterate())
 
-		return nodes
+		return list(self.Iterate(self.Min(node), self.Max(node).next))
 
 	# generates a pdf file containing a plot of the tree, via the graphviz package
 	def PlotTree(self, filename=DEFAULT, label_fn=lambda node : f"{node.data}"):
@@ -300,10 +348,9 @@ class FortuneTree:
 		if filename == DEFAULT:
 			filename = f"fortune_tree_{time.time()}"
 
-		nodes = self.ListNodes()
 		dot = graphviz.Digraph()
 
-		for node in nodes:
+		for node in self.Iterate():
 			dot.node(label_fn(node))
 
 			if node.left != None:
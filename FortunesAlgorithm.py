@@ -1,37 +1,219 @@
+import math
+
+import numpy as np
+
 import Events
 import PriorityQueue
 import BeachLine
 import Graphs
+import Predicates
+from Point import Point
 
-# TODO: think carefully about chain of "imports" i.e. which structures know about each other
+# sweeps a horizontal line down the plane, maintaining the beachline of parabolic arcs above it, and
+# tracing out the voronoi diagram of the sites behind it
+# the sites can be given as a list of Points, or as an (n, 2) array of coordinates (as made by SiteGenerator)
+# given a Boundary, the finished diagram is clipped to it, otherwise its outermost edges are left running off to infinity
 class FortunesAlgorithm:
-	def __init__(self, sites):
-		sites.sort(key=lambda point : point.y)
-		events = [Events.SiteEvent(site) for site in sites]
-		starting_event = events.pop()
+	def __init__(self, sites, boundary=None):
+		self.G = Graphs.VoronoiDiagram(sites)
+		self.boundary = boundary
+
+		# one per face, kept from one sweep to the next
+		self.site_events = []
+
+		# the sweepline moves down the plane, meeting events with equal y from left to right
+		self.Q = PriorityQueue.PriorityQueue(key_fn=lambda event : (-event.y, event.x))
+		self.B = BeachLine.BeachLine(None)
+		self.Restart()
+
+	# get ready to sweep (again) from the top, optionally with a new set of sites first (an (n, 2) array, of any length),
+	# keeping the site events, queue, beachline and the diagram's storage for reuse
+	def Restart(self, sites=None):
+		if sites is not None:
+			self.G.MoveSites(sites)
+		else:
+			self.G.Clear()
+
+		# the events are moved along with their sites, and more made when there are more sites than ever before
+		# (plain python floats make for much quicker arithmetic in the sweep than numpy scalars)
+		count = self.G.face_count
+		made = len(self.site_events)
+		if sites is not None or made < count:
+			xy = self.G.site_xy.tolist()
+			if sites is not None:
+				for event, (x, y) in zip(self.site_events, xy):
+					event.Move(Point(x, y))
+			self.site_events.extend(Events.SiteEvent(Point(x, y), face) for face, (x, y) in enumerate(xy[made:], made))
 
-		self.Q = PriorityQueue.PriorityQueue(events)
-		self.B = BeachLine.BeachLine(BeachLine.Arc(starting_event.site))
-		self.G = Graphs.VoronoiDiagram() # TODO whatever args this guy needs
+		# sites deleted from the diagram (whose rows are NaN) are left out, keeping their faces empty
+		events = self.site_events[:count]
+		deleted = np.isnan(self.G.site_xy[:count, 0])
+		if deleted.any():
+			events = [event for event, gone in zip(events, deleted.tolist()) if not gone]
 
+		self.Q.reset(events)
+		self.B.Clear()
+
+		self.sweepline = math.inf
+		self.last_site = None
+
+	# sweep the whole plane, returning whether it succeeded
 	def RunAlgorithm(self):
-		success = False
+		for _ in self.__Sweep(False):
+			pass
+
+		return self.success
+
+	# the same sweep as RunAlgorithm, handling one event each time a SweepRecord is asked for, so that renderers and
+	# loggers can follow it as it goes (lazily: e.g. every k-th event, by itertools.islice); the finished diagram is
+	# clipped as usual, and success left in self.success, once the stream is used up
+	# repeated sites, which add nothing to the beachline, get no record
+	def Stream(self):
+		return self.__Sweep(True)
+
+	# the sweep itself, handling an event at each step, and yielding a SweepRecord of it when records is set (or else
+	# None, without any of the bookkeeping); success is left in self.success, and the diagram clipped at the end
+	def __Sweep(self, records):
+		self.success = True
 
 		while not self.Q.is_empty():
 			event = self.Q.pop()
+			self.sweepline = event.y
+
+			if records:
+				vertex_count, halfedge_count, arc_count = self.G.vertex_count, self.G.halfedge_count, self.B.arc_count
+				if isinstance(event, Events.CircleEvent):
+					arc = event.arc
+					arcs = (arc.previous.face, arc.face, arc.next.face)
 
 			if isinstance(event, Events.SiteEvent):
-				success = self.HandleSiteEvent()
+				self.success = self.HandleSiteEvent(event)
 			elif isinstance(event, Events.CircleEvent):
-				success = self.HandleCircleEvent()
-		
-		return success
+				self.success = self.HandleCircleEvent(event)
+
+			if not self.success:
+				return
+
+			if not records:
+				yield None
+				continue
+
+			if isinstance(event, Events.SiteEvent):
+				if self.B.arc_count == arc_count:
+					continue
+				if self.G.halfedge_count > halfedge_count:
+					arcs = (int(self.G.face[halfedge_count]), int(self.G.face[halfedge_count + 1]))
+				else:
+					arcs = (event.face,)
+
+			yield Events.SweepRecord("site" if isinstance(event, Events.SiteEvent) else "circle", event.y, arcs,
+									 range(vertex_count, self.G.vertex_count), range(halfedge_count, self.G.halfedge_count))
+
+		if self.boundary != None:
+			self.boundary.Clip(self.G)
+
+	# a new site splits the arc above it, and the two pieces begin tracing an edge between their faces
+	def HandleSiteEvent(self, event):
+		site = event.site
+
+		# repeated sites arrive back to back, and the copies get empty faces
+		if self.last_site != None and site.x == self.last_site.x and site.y == self.last_site.y:
+			return True
+		self.last_site = site
+
+		# the arc above (if there is one) keeps the left-hand piece of itself
+		arc = BeachLine.Arc(site, event.face)
+		above, right = self.B.AddArc(arc)
+
+		if above == None:
+			return True
 
+		# sites level with the very first one have nothing above them to split, so they line up side by side,
+		# and (as they arrive from left to right) each new one lands to the right of the last
+		if right == None:
+			above.right_halfedge, arc.left_halfedge = self.G.AddEdge(above.face, arc.face)
+			return True
+
+		self.InvalidateCircleEvent(above)
+
+		outer, inner = self.G.AddEdge(above.face, arc.face)
+		above.right_halfedge = outer
+		right.left_halfedge = outer
+		arc.left_halfedge = inner
+		arc.right_halfedge = inner
+
+		self.CheckCircleEvent(above)
+		self.CheckCircleEvent(right)
 
-	def HandleSiteEvent(self):
-		# TODO
 		return True
 
-	def HandleCircleEvent(self):
-		# TODO
-		return True
\ No newline at end of file
+	# an arc is squeezed out of the beachline, its two breakpoints meeting at a voronoi vertex
+	def HandleCircleEvent(self, event):
+		arc = event.arc
+		left = arc.previous
+		right = arc.next
+		arc.event = None
+
+		self.InvalidateCircleEvent(left)
+		self.InvalidateCircleEvent(right)
+
+		vertex = self.G.AddVertex(event.center.x, event.center.y)
+
+		# the edges traced by the two vanishing breakpoints end here, closing off a corner of the arc's face
+		self.G.SetOrigin(left.right_halfedge, vertex)
+		self.G.SetOrigin(arc.right_halfedge, vertex)
+		self.G.Link(arc.left_halfedge, arc.right_halfedge)
+
+		# and a new edge, between the faces on either side, starts here
+		left_halfedge, right_halfedge = self.G.AddEdge(left.face, right.face)
+		self.G.SetOrigin(right_halfedge, vertex)
+		self.G.Link(left_halfedge, left.right_halfedge)
+		self.G.Link(right.left_halfedge, right_halfedge)
+
+		left.right_halfedge = left_halfedge
+		right.left_halfedge = right_halfedge
+
+		self.B.Delete(arc)
+		self.B.arc_count -= 1
+
+		self.CheckCircleEvent(left)
+		self.CheckCircleEvent(right)
+
+		return True
+
+	# queue up the circle event (if any) in which the given arc is squeezed out between its neighbours
+	def CheckCircleEvent(self, arc):
+		left = arc.previous
+		right = arc.next
+
+		if left == None or right == None:
+			return
+
+		a, b, c = left.focus, arc.focus, right.focus
+
+		# the breakpoints only converge if the foci turn clockwise (this also rules out left and right sharing a focus),
+		# which is decided exactly, however nearly collinear they are
+		if Predicates.Orientation(a, b, c) >= 0:
+			return
+
+		# work relative to the left focus, to keep the arithmetic well-conditioned
+		bx, by = b.x - a.x, b.y - a.y
+		cx, cy = c.x - a.x, c.y - a.y
+		d = 2 * (bx * cy - by * cx)
+
+		b2 = bx * bx + by * by
+		c2 = cx * cx + cy * cy
+		ux = (cy * b2 - by * c2) / d
+		uy = (bx * c2 - cx * b2) / d
+
+		# the arc vanishes when the sweepline reaches the bottom of the circle through all three foci
+		center = Point(a.x + ux, a.y + uy)
+		event = Events.CircleEvent(arc, center, center.y - math.hypot(ux, uy))
+
+		arc.event = event
+		self.Q.insert(event)
+
+	def InvalidateCircleEvent(self, arc):
+		if arc.event != None:
+			self.Q.invalidate(arc.event)
+			arc.event = None
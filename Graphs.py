@@ -1,10 +1,651 @@
+import numpy as np
+
+# capacity given to an empty DCEL, before it has to grow
+MIN_CAPACITY = 16
+
+
+# copy of a 1d or 2d array, with room for the given number of rows, padding new rows with the fill value
+def Grow(array, capacity, fill):
+	grown = np.full((capacity,) + array.shape[1:], fill, dtype=array.dtype)
+	grown[:len(array)] = array
+	return grown
+
+# an array holding the given values in its first rows, and the fill value in the rest of the used rows after them: the
+# given array itself if it has room, or else a new one just big enough
+def Refill(array, values, used, fill):
+	if len(array) < len(values):
+		array = np.full((len(values),) + array.shape[1:], fill, dtype=array.dtype)
+
+	array[:len(values)] = values
+	array[len(values):used] = fill
+	return array
+
+# stable ordering of an array of non-negative int32 keys, in O(n): numpy radix sorts 16-bit keys, so sorting by the low
+# and then the high halves does the job in two passes
+def CountingSortOrder(keys):
+	order = np.argsort((keys & 0xFFFF).astype(np.uint16), kind="stable")
+	return order[np.argsort((keys[order] >> 16).astype(np.uint16), kind="stable")]
 
 # doubly connected edge list implementation
+# records are stored column-wise, in preallocated NumPy arrays that double in size when full, and refer to one another
+# by int32 id (with -1 meaning "none"); only the first VertexCount()/HalfedgeCount()/FaceCount() rows are in use
+# each face is traced counterclockwise by its half-edges, and a half-edge's destination is its twin's origin
+# removing a vertex or edge leaves a gap (a nan vertex, or a pair of half-edges with no faces), which the next one added
+# fills, and Compact() squeezes any that are left out of the arrays
 class DCEL:
-	def __init__(self):
-		return
-	
+	def __init__(self, vertex_capacity=MIN_CAPACITY, halfedge_capacity=MIN_CAPACITY, face_capacity=MIN_CAPACITY):
+		# vertex data
+		self.vertex_xy = np.full((max(vertex_capacity, 1), 2), np.nan)
+		self.vertex_count = 0
+
+		# half-edge data (twins are always allocated together, as 2k and 2k+1)
+		halfedge_capacity = max(halfedge_capacity + halfedge_capacity % 2, 2)
+		self.origin = np.full(halfedge_capacity, -1, dtype=np.int32)
+		self.twin = np.full(halfedge_capacity, -1, dtype=np.int32)
+		self.next = np.full(halfedge_capacity, -1, dtype=np.int32)
+		self.prev = np.full(halfedge_capacity, -1, dtype=np.int32)
+		self.face = np.full(halfedge_capacity, -1, dtype=np.int32)
+		self.halfedge_count = 0
+
+		# face data, storing one (any) half-edge on the boundary of each face
+		self.face_halfedge = np.full(max(face_capacity, 1), -1, dtype=np.int32)
+		self.face_count = 0
+
+		# gaps left by removals, as vertex ids and the even ids of half-edge pairs
+		self.free_vertices = []
+		self.free_halfedges = []
+
+	def VertexCount(self):
+		return self.vertex_count
+
+	def HalfedgeCount(self):
+		return self.halfedge_count
+
+	def FaceCount(self):
+		return self.face_count
+
+	# views of the in-use part of each array
+	def Vertices(self):
+		return self.vertex_xy[:self.vertex_count]
+
+	def Halfedges(self):
+		count = self.halfedge_count
+		return self.origin[:count], self.twin[:count], self.next[:count], self.prev[:count], self.face[:count]
+
+	def AddVertex(self, x, y):
+		if self.free_vertices:
+			vertex = self.free_vertices.pop()
+		else:
+			vertex = self.vertex_count
+			self.vertex_count += 1
+
+			if vertex == len(self.vertex_xy):
+				self.vertex_xy = Grow(self.vertex_xy, 2 * vertex, np.nan)
+
+		self.vertex_xy[vertex, 0] = x
+		self.vertex_xy[vertex, 1] = y
+		return vertex
+
+	def RemoveVertex(self, vertex):
+		self.vertex_xy[vertex] = np.nan
+		self.free_vertices.append(vertex)
+
+	def AddFace(self):
+		face = self.face_count
+
+		if face == len(self.face_halfedge):
+			self.GrowFaces(2 * face)
+
+		self.face_count += 1
+		return face
+
+	def GrowFaces(self, capacity):
+		self.face_halfedge = Grow(self.face_halfedge, capacity, -1)
+
+	# add a pair of twinned half-edges, lying along the boundaries of the two given faces, and return their ids
+	def AddEdge(self, face, twin_face):
+		if self.free_halfedges:
+			halfedge = self.free_halfedges.pop()
+		else:
+			halfedge = self.halfedge_count
+			self.halfedge_count += 2
+
+			if halfedge == len(self.origin):
+				capacity = 2 * halfedge
+				self.origin = Grow(self.origin, capacity, -1)
+				self.twin = Grow(self.twin, capacity, -1)
+				self.next = Grow(self.next, capacity, -1)
+				self.prev = Grow(self.prev, capacity, -1)
+				self.face = Grow(self.face, capacity, -1)
+
+		twin = halfedge + 1
+		self.twin[halfedge] = twin
+		self.twin[twin] = halfedge
+		self.face[halfedge] = face
+		self.face[twin] = twin_face
+
+		if self.face_halfedge[face] == -1:
+			self.face_halfedge[face] = halfedge
+		if self.face_halfedge[twin_face] == -1:
+			self.face_halfedge[twin_face] = twin
+
+		return halfedge, twin
+
+	# remove the edge that a half-edge lies along (both it and its twin), leaving its neighbours' links to be mended
+	def RemoveEdge(self, halfedge):
+		halfedge -= halfedge % 2
+		self.origin[halfedge:halfedge + 2] = -1
+		self.next[halfedge:halfedge + 2] = -1
+		self.prev[halfedge:halfedge + 2] = -1
+		self.face[halfedge:halfedge + 2] = -1
+		self.free_halfedges.append(halfedge)
+
+	def SetOrigin(self, halfedge, vertex):
+		self.origin[halfedge] = vertex
+
+	def SetDestination(self, halfedge, vertex):
+		self.origin[self.twin[halfedge]] = vertex
+
+	def Destination(self, halfedge):
+		return self.origin[self.twin[halfedge]]
+
+	# join two consecutive half-edges on the boundary of a face
+	def Link(self, halfedge, next):
+		self.next[halfedge] = next
+		self.prev[next] = halfedge
+
+	# swap in a whole new set of vertices and half-edges (as rebuilt in bulk, e.g. by clipping), keeping the faces, and
+	# the storage too, where it has room
+	# the half-edges must come in twinned pairs 2k, 2k+1, and each face is pointed at the last half-edge along it
+	def Replace(self, vertex_xy, origin, next, prev, face):
+		vertex_count, halfedge_count = self.vertex_count, self.halfedge_count
+		self.vertex_count = len(vertex_xy)
+		self.halfedge_count = len(origin)
+
+		self.vertex_xy = Refill(self.vertex_xy, vertex_xy, vertex_count, np.nan)
+		self.origin = Refill(self.origin, origin, halfedge_count, -1)
+		self.twin = Refill(self.twin, np.arange(self.halfedge_count) ^ 1, halfedge_count, -1)
+		self.next = Refill(self.next, next, halfedge_count, -1)
+		self.prev = Refill(self.prev, prev, halfedge_count, -1)
+		self.face = Refill(self.face, face, halfedge_count, -1)
+
+		self.face_halfedge[:] = -1
+		bounded = np.nonzero(face >= 0)[0]
+		self.face_halfedge[face[bounded]] = bounded
+
+		self.free_vertices = []
+		self.free_halfedges = []
+
+	# remove every vertex and half-edge (leaving the faces, with nothing along them), keeping the storage
+	def Clear(self):
+		self.vertex_xy[:self.vertex_count] = np.nan
+		count = self.halfedge_count
+		for array in (self.origin, self.twin, self.next, self.prev, self.face):
+			array[:count] = -1
+
+		self.vertex_count = 0
+		self.halfedge_count = 0
+		self.face_halfedge[:self.face_count] = -1
+		self.free_vertices = []
+		self.free_halfedges = []
+
+	# squeeze out the gaps left by removals, renumbering the vertices and half-edges that remain
+	def Compact(self):
+		vertex_xy = self.Vertices()
+		origin, twin, next, prev, face = self.Halfedges()
+
+		kept_vertices = ~np.isnan(vertex_xy[:, 0])
+		kept = np.repeat((face[0::2] >= 0) | (face[1::2] >= 0), 2)
+
+		vertex_map = np.append(np.cumsum(kept_vertices) - 1, -1)
+		halfedge_map = np.append(np.cumsum(kept) - 1, -1)
+		self.Replace(vertex_xy[kept_vertices], vertex_map[origin[kept]], halfedge_map[next[kept]],
+					 halfedge_map[prev[kept]], face[kept])
+
+	# the half-edges along a face, in order (counterclockwise), and whether they close up; the boundary of a cell running
+	# off to infinity is an open chain, listed from the end that comes in from infinity
+	def FaceHalfedges(self, face):
+		first = self.face_halfedge[face]
+		if first < 0:
+			return [], False
+
+		halfedge = first
+		while self.prev[halfedge] >= 0 and self.prev[halfedge] != first:
+			halfedge = self.prev[halfedge]
+		closed = self.prev[halfedge] == first
+		if closed:
+			halfedge = first
+
+		halfedges = [halfedge]
+		while self.next[halfedge] >= 0 and self.next[halfedge] != halfedges[0]:
+			halfedge = self.next[halfedge]
+			halfedges.append(halfedge)
+
+		return halfedges, closed
+
+	# release the spare capacity at the end of each array, once construction is over
+	def Shrink(self):
+		self.vertex_xy = self.vertex_xy[:max(self.vertex_count, 1)].copy()
+		count = max(self.halfedge_count, 2)
+		self.origin = self.origin[:count].copy()
+		self.twin = self.twin[:count].copy()
+		self.next = self.next[:count].copy()
+		self.prev = self.prev[:count].copy()
+		self.face = self.face[:count].copy()
+		self.face_halfedge = self.face_halfedge[:max(self.face_count, 1)].copy()
+
+	# bytes held by the arrays, including any spare capacity
+	def Nbytes(self):
+		arrays = [self.vertex_xy, self.origin, self.twin, self.next, self.prev, self.face, self.face_halfedge]
+		return sum(array.nbytes for array in arrays)
+
+# a voronoi diagram is a DCEL with one face per site, face i initially belonging to site i
+# the sites can be a list of Points or an (n, 2) array, and edges running off to infinity are left with a missing (-1) origin or destination
+# sites can be added and removed afterwards, each by mending the diagram round the cell that appears or disappears (a
+# removed site's row of site_xy becomes nan, and its face is left empty); this relies on the sites being in general
+# position (no repeats, and no four on a circle), and is only for diagrams that have not been clipped
 class VoronoiDiagram(DCEL):
-	def __init__(self):
-		super().__init__()
-		return
\ No newline at end of file
+	def __init__(self, sites):
+		n = len(sites)
+
+		# a diagram of n sites has at most 2n vertices and 6n half-edges
+		super().__init__(2 * n, 6 * n, n)
+
+		# site_xy is a view of the in-use rows of a buffer that grows with the faces
+		self.site_buffer = np.full((max(n, 1), 2), np.nan)
+		self.site_buffer[:n] = np.array(sites, dtype=np.float64).reshape(n, 2)
+		self.site_xy = self.site_buffer[:0]
+		self.face_site = np.arange(max(n, 1), dtype=np.int32)
+
+		for face in range(n):
+			self.AddFace()
+
+		# the face that the last search for a site ended at, as a good place to start the next one
+		self.last_face = -1
+
+		return
+
+	def Clear(self):
+		super().Clear()
+		self.last_face = -1
+
+	# give the diagram a new set of sites (as many as before, or not), one face each, and clear it out, ready to sweep again
+	def MoveSites(self, sites):
+		sites = np.asarray(sites, dtype=np.float64).reshape(-1, 2)
+		n = len(sites)
+		self.Clear()
+
+		if n > len(self.face_halfedge):
+			self.GrowFaces(n)
+
+		self.face_count = n
+		self.face_halfedge[:n] = -1
+		self.face_site[:n] = np.arange(n)
+		self.site_xy = self.site_buffer[:n]
+		self.site_xy[:] = sites
+
+	def AddFace(self):
+		face = super().AddFace()
+		self.site_xy = self.site_buffer[:self.face_count]
+		return face
+
+	def GrowFaces(self, capacity):
+		super().GrowFaces(capacity)
+		self.face_site = Grow(self.face_site, capacity, -1)
+		self.site_buffer = Grow(self.site_buffer, capacity, np.nan)
+		self.site_xy = self.site_buffer[:self.face_count]
+
+	def Shrink(self):
+		super().Shrink()
+		self.face_site = self.face_site[:max(self.face_count, 1)].copy()
+		self.site_buffer = self.site_buffer[:max(self.face_count, 1)].copy()
+		self.site_xy = self.site_buffer[:self.face_count]
+
+	def Nbytes(self):
+		return super().Nbytes() + self.site_buffer.nbytes + self.face_site.nbytes
+
+	# the faces across each half-edge of a face's boundary, in order
+	def NeighbouringFaces(self, face):
+		halfedges, _ = self.FaceHalfedges(face)
+		return [self.face[self.twin[halfedge]] for halfedge in halfedges]
+
+	# the face whose site is nearest the point (x, y), by a greedy walk across the diagram from the given face (or else
+	# the nearest of a spread of faces sampled from the whole diagram), or -1 if no site has an edge
+	def NearestFace(self, x, y, near=None):
+		if near == None or self.face_halfedge[near] < 0:
+			count = self.face_count
+			sample = np.arange(0, count, max(count // (int(np.cbrt(count)) + 1), 1))
+			if self.last_face >= 0:
+				sample = np.append(sample, self.last_face)
+			sample = sample[self.face_halfedge[sample] >= 0]
+
+			if len(sample) == 0:
+				sample = np.nonzero(self.face_halfedge[:count] >= 0)[0]
+				if len(sample) == 0:
+					return -1
+
+			distance = (self.site_xy[sample, 0] - x)**2 + (self.site_xy[sample, 1] - y)**2
+			near = sample[np.argmin(distance)]
+
+		face = near
+		best = (self.site_xy[face, 0] - x)**2 + (self.site_xy[face, 1] - y)**2
+
+		while True:
+			neighbours = self.NeighbouringFaces(face)
+			distance = (self.site_xy[neighbours, 0] - x)**2 + (self.site_xy[neighbours, 1] - y)**2
+			if distance.min() >= best:
+				self.last_face = face
+				return face
+
+			face = neighbours[np.argmin(distance)]
+			best = distance.min()
+
+	# a half-edge's direction, counterclockwise round its face's site p: the bisector with its twin's site q, turned
+	def __Direction(self, halfedge):
+		p = self.site_xy[self.face_site[self.face[halfedge]]]
+		q = self.site_xy[self.face_site[self.face[self.twin[halfedge]]]]
+		return np.array([p[1] - q[1], q[0] - p[0]])
+
+	# add a site at (x, y), carving its cell out of the cells around it, and return its face
+	# the cells that lose ground to it are visited counterclockwise round the new site (then clockwise, if its cell runs
+	# off to infinity); in each, the vertices closer to the new site than their own are cut away, and a new edge runs
+	# across the gap, so the work done is proportional to the number of edges that change
+	def InsertSite(self, x, y, near=None):
+		start = self.NearestFace(x, y, near)
+
+		face = self.AddFace()
+		self.site_buffer[face] = x, y
+		self.face_site[face] = face
+
+		if start < 0:
+			# no site has an edge, so the new one is paired with whichever site there is (if any, and not a repeat)
+			live = np.nonzero(~np.isnan(self.site_xy[:face, 0]))[0]
+			if len(live) > 0 and (self.site_xy[live[0]] != (x, y)).any():
+				self.AddEdge(live[0], face)
+			self.last_face = face
+			return face
+
+		if (self.site_xy[start] == (x, y)).all():
+			return face
+
+		s = np.array([x, y])
+		conflict = {}
+		cut = {}
+
+		# whether the end of a half-edge (its destination) is closer to the new site than to the sites around it: a vertex
+		# by its distances, and an end at infinity by which side of the new site's bisector it runs off to
+		def InConflict(halfedge):
+			vertex = self.origin[self.twin[halfedge]]
+			key = vertex if vertex >= 0 else -2 - halfedge
+
+			if key not in conflict:
+				p = self.site_xy[self.face_site[self.face[halfedge]]]
+				if vertex >= 0:
+					v = self.vertex_xy[vertex]
+					conflict[key] = ((v - s)**2).sum() < ((v - p)**2).sum()
+				else:
+					conflict[key] = (self.__Direction(halfedge) * (s - p)).sum() > 0
+
+			return conflict[key]
+
+		# where the new site's bisector with a face's site crosses one of its half-edges (shared by the twin)
+		def Cut(halfedge):
+			edge = halfedge - halfedge % 2
+			if edge not in cut:
+				p = self.site_xy[self.face_site[self.face[halfedge]]]
+				q = self.site_xy[self.face_site[self.face[self.twin[halfedge]]]]
+				direction = self.__Direction(halfedge)
+				base = self.origin[halfedge]
+				if base < 0:
+					base = self.origin[self.twin[halfedge]]
+				base = self.vertex_xy[base] if base >= 0 else (p + q) / 2
+
+				distance = ((base - s)**2).sum() - ((base - p)**2).sum()
+				cut[edge] = base + distance / (2 * (direction * (s - p)).sum()) * direction
+
+			return cut[edge]
+
+		# the half-edges of a face where its boundary runs into the new cell, and back out of it, with None for one crossed
+		# at infinity, and the half-edges lying wholly inside
+		def Crossings(face):
+			halfedges, closed = self.FaceHalfedges(face)
+			ends = [InConflict(halfedge) for halfedge in halfedges]
+			starts = ends[-1:] + ends[:-1] if closed else [InConflict(self.twin[halfedges[0]])] + ends[:-1]
+
+			into = out_of = None
+			inside = []
+			for halfedge, start, end in zip(halfedges, starts, ends):
+				if not start and end:
+					into = halfedge
+				elif start and not end:
+					out_of = halfedge
+				elif start and end:
+					inside.append(halfedge)
+
+			return into, out_of, inside
+
+		# the faces round the new cell, counterclockwise, each with its crossings
+		crossings = {}
+		order = [start]
+		crossings[start] = Crossings(start)
+		while crossings[order[-1]][0] != None:
+			neighbour = self.face[self.twin[crossings[order[-1]][0]]]
+			if neighbour == start:
+				break
+			crossings[neighbour] = Crossings(neighbour)
+			order.append(neighbour)
+
+		closed = crossings[order[-1]][0] != None
+		if not closed:
+			while crossings[order[0]][1] != None:
+				neighbour = self.face[self.twin[crossings[order[0]][1]]]
+				crossings[neighbour] = Crossings(neighbour)
+				order.insert(0, neighbour)
+
+		# work out the new vertices before removing anything, then clear out the old ones inside the new cell
+		points = {}
+		for neighbour in order:
+			into, out_of, inside = crossings[neighbour]
+			for halfedge in (into, out_of):
+				if halfedge != None:
+					points[halfedge - halfedge % 2] = Cut(halfedge)
+
+		removed = set()
+		for neighbour in order:
+			for halfedge in crossings[neighbour][2]:
+				edge = halfedge - halfedge % 2
+				if edge not in removed:
+					removed.add(edge)
+					self.RemoveEdge(edge)
+
+		for vertex, inside in conflict.items():
+			if vertex >= 0 and inside:
+				self.RemoveVertex(vertex)
+
+		vertices = {edge: self.AddVertex(*point) for edge, point in points.items()}
+
+		# a new edge across each face, from where it runs into the new cell to where it runs out, with its twin going back
+		# the other way round the new cell
+		outer = []
+		for neighbour in order:
+			into, out_of, inside = crossings[neighbour]
+			halfedge, twin = self.AddEdge(neighbour, face)
+			self.face_halfedge[neighbour] = halfedge
+
+			if into != None:
+				vertex = vertices[into - into % 2]
+				self.SetDestination(into, vertex)
+				self.SetOrigin(halfedge, vertex)
+				self.Link(into, halfedge)
+			if out_of != None:
+				vertex = vertices[out_of - out_of % 2]
+				self.SetOrigin(out_of, vertex)
+				self.SetOrigin(twin, vertex)
+				self.Link(halfedge, out_of)
+
+			outer.append(twin)
+
+		for halfedge, next in zip(outer, outer[1:] + outer[:1] if closed else outer[1:]):
+			self.Link(halfedge, next)
+		self.face_halfedge[face] = outer[0]
+
+		self.last_face = face
+		return face
+
+	# remove a site, sharing its cell out among its neighbours, and leave its face empty
+	# within the cell, the diagram of the remaining sites is the diagram of just the neighbours, which is built with a
+	# sweep of its own: its edges reaching into the cell extend the edges between the neighbours that ended there, and the
+	# ones lying wholly inside are added, so the work done is proportional to the number of neighbours
+	def DeleteSite(self, face):
+		from FortunesAlgorithm import FortunesAlgorithm
+
+		halfedges, closed = self.FaceHalfedges(face)
+		neighbours = [self.face[self.twin[halfedge]] for halfedge in halfedges]
+		p = self.site_xy[self.face_site[face]].copy()
+
+		self.site_buffer[face] = np.nan
+		self.face_halfedge[face] = -1
+		if self.last_face == face:
+			self.last_face = -1
+
+		if len(halfedges) == 0:
+			return
+
+		if len(halfedges) == 1:
+			self.face_halfedge[neighbours[0]] = -1
+			self.RemoveEdge(halfedges[0])
+			return
+
+		# the edges between consecutive neighbours that end at a vertex of the cell, by the pair of faces they lie between
+		ending = {}
+		for halfedge in (halfedges if closed else halfedges[:-1]):
+			edge = self.prev[self.twin[halfedge]]
+			ending[frozenset((self.face[edge], self.face[self.twin[edge]]))] = edge
+
+		algorithm = FortunesAlgorithm(self.site_xy[self.face_site[neighbours]])
+		assert algorithm.RunAlgorithm(), "failed to rebuild the diagram round a removed site"
+		L = algorithm.G
+		local_origin, local_twin, local_next, local_prev, local_face = L.Halfedges()
+		local_faces = np.array(neighbours)[local_face]
+
+		for halfedge in halfedges:
+			vertex = self.origin[halfedge]
+			if vertex >= 0:
+				self.RemoveVertex(vertex)
+			self.RemoveEdge(halfedge)
+
+		# whether the end of a local half-edge (its destination) lies in the removed cell, by the same tests as InsertSite
+		def Inside(halfedge):
+			vertex = local_origin[local_twin[halfedge]]
+			q = L.site_xy[local_face[halfedge]]
+			if vertex >= 0:
+				v = L.vertex_xy[vertex]
+				return ((v - p)**2).sum() < ((v - q)**2).sum()
+			r = L.site_xy[local_face[local_twin[halfedge]]]
+			return ((q[1] - r[1]) * (p[0] - q[0]) + (r[0] - q[0]) * (p[1] - q[1])) > 0
+
+		inside = np.array([Inside(halfedge) for halfedge in range(L.HalfedgeCount())], dtype=bool)
+		halfedge_map = np.full(L.HalfedgeCount(), -1, dtype=np.int64)
+		vertex_map = {}
+
+		def Vertex(vertex):
+			if vertex < 0:
+				return -1
+			if vertex not in vertex_map:
+				vertex_map[vertex] = self.AddVertex(*L.vertex_xy[vertex])
+			return vertex_map[vertex]
+
+		for edge in range(0, L.HalfedgeCount(), 2):
+			at_origin, at_destination = inside[edge + 1], inside[edge]
+			if at_origin and at_destination:
+				halfedge_map[edge], halfedge_map[edge + 1] = self.AddEdge(local_faces[edge], local_faces[edge + 1])
+			elif at_origin or at_destination:
+				kept = ending[frozenset((local_faces[edge], local_faces[edge + 1]))]
+				if self.face[kept] != local_faces[edge]:
+					kept = self.twin[kept]
+				halfedge_map[edge], halfedge_map[edge + 1] = kept, self.twin[kept]
+			else:
+				continue
+
+			if at_origin:
+				self.SetOrigin(halfedge_map[edge], Vertex(local_origin[edge]))
+			if at_destination:
+				self.SetOrigin(halfedge_map[edge + 1], Vertex(local_origin[edge + 1]))
+
+		# link up the kept half-edges at their ends inside the cell, as they are in the local diagram
+		for halfedge in np.nonzero(halfedge_map >= 0)[0]:
+			kept = halfedge_map[halfedge]
+			self.face_halfedge[self.face[kept]] = kept
+			if inside[halfedge]:
+				if local_next[halfedge] >= 0:
+					self.Link(kept, halfedge_map[local_next[halfedge]])
+				else:
+					self.next[kept] = -1
+			if inside[local_twin[halfedge]] and local_prev[halfedge] < 0:
+				self.prev[kept] = -1
+
+	# the area and centroid of each face, as arrays of FaceCount() and (FaceCount(), 2), in one pass over the half-edges,
+	# each adding the signed area and moment of the triangle it makes with its face's site (working relative to the site,
+	# for accuracy); faces running off to infinity get an infinite area, and they and empty faces get a nan centroid
+	def Centroids(self):
+		origin, twin, next, prev, face = self.Halfedges()
+		count = self.face_count
+
+		live = face >= 0
+		unbounded = np.bincount(face[live & ((origin < 0) | (origin[twin] < 0))], minlength=count) > 0
+		edges = np.nonzero(live & (origin >= 0) & (origin[twin] >= 0))[0]
+
+		faces = face[edges]
+		site_xy = self.site_xy[self.face_site[:count]]
+		a = self.vertex_xy[origin[edges]] - site_xy[faces]
+		b = self.vertex_xy[origin[twin[edges]]] - site_xy[faces]
+		cross = a[:, 0] * b[:, 1] - a[:, 1] * b[:, 0]
+
+		area = np.bincount(faces, cross, minlength=count) / 2
+		moment = np.stack([np.bincount(faces, (a[:, 0] + b[:, 0]) * cross, minlength=count),
+						   np.bincount(faces, (a[:, 1] + b[:, 1]) * cross, minlength=count)], axis=1) / 6
+
+		with np.errstate(divide="ignore", invalid="ignore"):
+			centroid = site_xy + moment / area[:, None]
+		centroid[(area == 0) | unbounded] = np.nan
+		area[unbounded] = np.inf
+		return area, centroid
+
+	# the neighbouring sites of each site (those whose faces share an edge with its face), in compressed sparse row form:
+	# the neighbours of site i are indices[indptr[i]:indptr[i + 1]], and both arrays are int32, so that e.g.
+	# scipy.sparse.csr_array((np.ones(len(indices)), indices, indptr), shape=(n, n)) can use them without copying
+	# one pass over the half-edges, each one between two faces making its face's site a neighbour of its twin's
+	def Adjacency(self):
+		origin, twin, next, prev, face = self.Halfedges()
+		n = len(self.site_xy)
+
+		between = (face >= 0) & (face[twin] >= 0)
+		site = self.face_site[face[between]]
+		neighbour = self.face_site[face[twin[between]]]
+
+		indptr = np.zeros(n + 1, dtype=np.int32)
+		np.cumsum(np.bincount(site, minlength=n), out=indptr[1:])
+		indices = np.ascontiguousarray(neighbour[CountingSortOrder(site)], dtype=np.int32)
+		return indptr, indices
+
+	# the delaunay triangulation of the sites, as a (t, 3) int32 array of site ids, each triangle counterclockwise
+	# every vertex of the diagram is the circumcentre of one triangle, made of the sites of the three faces around it (a
+	# vertex shared by more than three faces is split in two by the sweep, giving a triangulation of the polygon); vertices
+	# on the boundary of a clipped diagram have no triangle, and those clipped away take theirs with them
+	def DelaunayTriangles(self):
+		origin, twin, next, prev, face = self.Halfedges()
+
+		# one half-edge out of each vertex, and the next two round it counterclockwise
+		first = np.full(self.vertex_count, -1, dtype=np.int64)
+		leaving = np.nonzero(origin >= 0)[0]
+		first[origin[leaving]] = leaving
+		first = first[first >= 0]
+
+		second = twin[prev[first]]
+		third = twin[prev[second]]
+		triangle = (prev[first] >= 0) & (prev[second] >= 0) & (prev[third] >= 0) & (twin[prev[third]] == first)
+		first, second, third = first[triangle], second[triangle], third[triangle]
+
+		faces = np.stack([face[first], face[second], face[third]], axis=1)
+		faces = faces[(faces >= 0).all(axis=1)]
+		return np.ascontiguousarray(self.face_site[faces], dtype=np.int32)
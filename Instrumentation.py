@@ -0,0 +1,173 @@
+import functools
+import json
+import time
+
+import BeachLine
+import Boundary
+import FortunesAlgorithm
+import FortuneTree
+import Predicates
+import PriorityQueue
+
+# counters and phase timers for the hot paths of the sweep, switched on by wrapping the methods concerned (and off by
+# putting the originals back), so that while disabled the sweep runs the very same code as without this module
+# usage: Enable(), run some sweeps, then Report() or Json(), and Disable()
+#
+# counters:
+#   rotations           single rotations in the FortuneTree (a double rotation counts two)
+#   rebalances          calls to FortuneTree.Rebalance
+#   retraces            calls to FortuneTree.Retrace, and retrace_depth: the nodes they walked up through in total, with
+#                       max_retrace_depth the longest single walk
+#   successor_steps     links followed by FortuneTree.Successor and Predecessor, over successor_calls calls
+#   breakpoints         calls to Arc.Breakpoint
+#   arc_searches        calls to BeachLine.GetArcAbove, with arc_search_depth: the levels they descended in total, and
+#                       arc_search_corrections: the steps along the beachline they then took to correct for rounding
+#   queue_pushes, queue_pops, queue_cancellations, queue_compactions    PriorityQueue operations (cancellations
+#                       counting only elements that were still live)
+#   orientations, breakpoint_sides      calls to Predicates.Orientation and BreakpointSide, with orientation_fallbacks
+#                       and breakpoint_fallbacks: the times they (or the tests making up BreakpointSide) fell back on
+#                       exact arithmetic
+# timers (seconds of wall time): setup (building the queue of site events), site_events, circle_events and clipping
+
+counters = {}
+timers = {}
+
+# the methods wrapped while enabled, with the originals to put back
+originals = {}
+
+
+def Reset():
+	for name in ["rotations", "rebalances", "retraces", "retrace_depth", "max_retrace_depth", "successor_steps",
+				 "successor_calls", "breakpoints", "arc_searches", "arc_search_depth", "arc_search_corrections",
+				 "queue_pushes", "queue_pops", "queue_cancellations", "queue_compactions", "orientations",
+				 "orientation_fallbacks", "breakpoint_sides", "breakpoint_fallbacks"]:
+		counters[name] = 0
+	for name in ["setup", "site_events", "circle_events", "clipping"]:
+		timers[name] = 0.0
+
+Reset()
+
+# how many links up a node is from the root of its tree
+def Depth(node):
+	depth = 0
+	while node.parent != None:
+		node = node.parent
+		depth += 1
+	return depth
+
+# wrappers adding to a counter on every call, or by an amount worked out from the call and its result
+def Counted(method, name):
+	@functools.wraps(method)
+	def Wrapper(*args, **kwargs):
+		counters[name] += 1
+		return method(*args, **kwargs)
+	return Wrapper
+
+def Timed(method, name):
+	@functools.wraps(method)
+	def Wrapper(*args, **kwargs):
+		start = time.perf_counter()
+		try:
+			return method(*args, **kwargs)
+		finally:
+			timers[name] += time.perf_counter() - start
+	return Wrapper
+
+def Retrace(method):
+	@functools.wraps(method)
+	def Wrapper(self, node):
+		depth = Depth(node) + 1 if node != None else 0
+		counters["retraces"] += 1
+		counters["retrace_depth"] += depth
+		counters["max_retrace_depth"] = max(counters["max_retrace_depth"], depth)
+		return method(self, node)
+	return Wrapper
+
+# the successor (or predecessor) is either below the node or above it, so the links walked are the difference in depth
+def Neighbour(method):
+	@functools.wraps(method)
+	def Wrapper(self, node):
+		result = method(self, node)
+		counters["successor_calls"] += 1
+		counters["successor_steps"] += abs(Depth(node) - Depth(result)) if result != None else Depth(node)
+		return result
+	return Wrapper
+
+# the arc a search descends to is the one handed on for correction, which only ever moves it a step or two, so the steps
+# are counted by walking out both ways from it until one walk reaches the corrected arc
+def ArcCorrection(method):
+	@functools.wraps(method)
+	def Wrapper(self, arc, x, sweepline):
+		result = method(self, arc, x, sweepline)
+		counters["arc_search_depth"] += Depth(arc)
+
+		left, right = arc, arc
+		while left != result and right != result:
+			left = left.previous if left != None else None
+			right = right.next if right != None else None
+			counters["arc_search_corrections"] += 1
+		return result
+	return Wrapper
+
+def Cancellation(method):
+	@functools.wraps(method)
+	def Wrapper(self, element):
+		if element.valid:
+			counters["queue_cancellations"] += 1
+		return method(self, element)
+	return Wrapper
+
+# (class, method name, wrapper) for everything instrumented, with the predicates wrapped in their module in the same way
+def Wrappers():
+	Tree = FortuneTree.FortuneTree
+	Queue = PriorityQueue.PriorityQueue
+	Algorithm = FortunesAlgorithm.FortunesAlgorithm
+
+	return [
+		(Tree, "RotateLeft", lambda method: Counted(method, "rotations")),
+		(Tree, "RotateRight", lambda method: Counted(method, "rotations")),
+		(Tree, "Rebalance", lambda method: Counted(method, "rebalances")),
+		(Tree, "Retrace", Retrace),
+		(Tree, "Successor", Neighbour),
+		(Tree, "Predecessor", Neighbour),
+		(BeachLine.Arc, "Breakpoint", lambda method: Counted(method, "breakpoints")),
+		(BeachLine.BeachLine, "GetArcAbove", lambda method: Counted(method, "arc_searches")),
+		(BeachLine.BeachLine, "CorrectArc", ArcCorrection),
+		(Queue, "insert", lambda method: Counted(method, "queue_pushes")),
+		(Queue, "pop", lambda method: Counted(method, "queue_pops")),
+		(Queue, "invalidate", Cancellation),
+		(Queue, "compact", lambda method: Counted(method, "queue_compactions")),
+		(Algorithm, "Restart", lambda method: Timed(method, "setup")),
+		(Algorithm, "HandleSiteEvent", lambda method: Timed(method, "site_events")),
+		(Algorithm, "HandleCircleEvent", lambda method: Timed(method, "circle_events")),
+		(Boundary.Boundary, "Clip", lambda method: Timed(method, "clipping")),
+		(Predicates, "Orientation", lambda method: Counted(method, "orientations")),
+		(Predicates, "ExactOrientation", lambda method: Counted(method, "orientation_fallbacks")),
+		(Predicates, "BreakpointSide", lambda method: Counted(method, "breakpoint_sides")),
+		(Predicates, "ExactQuadraticSign", lambda method: Counted(method, "breakpoint_fallbacks")),
+		(Predicates, "ExactVertexSign", lambda method: Counted(method, "breakpoint_fallbacks")),
+		(Predicates, "ExactMidpointSide", lambda method: Counted(method, "breakpoint_fallbacks")),
+	]
+
+def Enabled():
+	return len(originals) > 0
+
+def Enable():
+	if Enabled():
+		return
+
+	for cls, name, wrapper in Wrappers():
+		originals[(cls, name)] = cls.__dict__[name]
+		setattr(cls, name, wrapper(cls.__dict__[name]))
+
+def Disable():
+	for (cls, name), method in originals.items():
+		setattr(cls, name, method)
+	originals.clear()
+
+# the counters and timers so far, as a dict of two dicts
+def Report():
+	return {"counters": dict(counters), "timers": dict(timers)}
+
+def Json(indent=None):
+	return json.dumps(Report(), indent=indent)
@@ -0,0 +1,396 @@
+import concurrent.futures
+import math
+import os
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+import Graphs
+from FortunesAlgorithm import FortunesAlgorithm
+
+# how far each strip reaches into its neighbours on either side, in multiples of the typical spacing between sites
+OVERLAP = 8
+
+
+# builds the voronoi diagram of the sites with several sweeps at once, one per vertical strip of the sites, in a pool of
+# processes, and stitches the strips' cells together into one VoronoiDiagram
+# each strip is swept along with an overlap of the sites either side of it, and vouches for those of its own cells whose
+# vertices' circles all lie within the sites it was given (so that nothing left out could be inside them): those cells
+# are exactly as a single sweep over all of the sites would make them; the few it can't vouch for (mostly those running
+# off to infinity) are swept again together, with the sites on the convex hull, until no site is left inside any of
+# their vertices' circles
+# the sites (sorted by x) go to the workers in shared memory, and their cells come back the same way
+# repeated sites are swept only once, as their first copy, and (just as in a single sweep) the other copies get empty
+# faces
+def ParallelVoronoiDiagram(sites, processes=None, strips=None, boundary=None):
+	G = Graphs.VoronoiDiagram(sites)
+	xy = G.site_xy
+	n = len(xy)
+
+	processes = processes or os.cpu_count() or 1
+	strips = strips or processes
+
+	if n == 0:
+		return G
+
+	# only the first copy of each site is swept
+	unique = np.sort(np.unique(xy, axis=0, return_index=True)[1])
+	n = len(unique)
+
+	# an overlap of OVERLAP site spacings, as a number of sites (taking the sites to be spread evenly over their bounding box)
+	width, height = xy.max(axis=0) - xy.min(axis=0)
+	overlap = int(math.ceil(OVERLAP * math.sqrt(n * height / width))) if width > 0 else n
+	strips = max(1, min(strips, n // max(overlap, 1)))
+
+	order = unique[np.argsort(xy[unique, 0], kind="stable")]
+	sorted_xy = xy[order]
+	bounds = np.linspace(0, n, strips + 1).astype(np.int64)
+
+	name, layout = Share([sorted_xy, order])
+	try:
+		tasks = []
+		for strip in range(strips):
+			begin, end = bounds[strip], bounds[strip + 1]
+			tasks.append((name, layout, begin, end, max(begin - overlap, 0), min(end + overlap, n)))
+
+		if processes == 1 or strips == 1:
+			results = [SweepStrip(*task) for task in tasks]
+		else:
+			with concurrent.futures.ProcessPoolExecutor(processes) as pool:
+				results = list(pool.map(SweepStrip, *zip(*tasks)))
+	finally:
+		block = shared_memory.SharedMemory(name=name)
+		block.close()
+		block.unlink()
+
+	pieces = [Collect(result) for result in results]
+
+	# sweep the cells that no strip could vouch for again, together
+	uncertified = np.concatenate([piece["uncertified"] for piece in pieces] + [np.zeros(0, dtype=np.int32)])
+	if len(uncertified) > 0:
+		neighbours = np.concatenate([piece["neighbours"] for piece in pieces])
+		hull = HullSites(xy, np.unique(np.concatenate([piece["hull"] for piece in pieces])))
+		pieces.append(Repair(xy, sorted_xy, order, uncertified, neighbours, hull))
+
+	Stitch(G, pieces)
+
+	if boundary != None:
+		boundary.Clip(G)
+
+	return G
+
+# copy arrays into one new block of shared memory, returning its name and where each array lies in it
+def Share(arrays):
+	layout = []
+	size = 0
+	for array in arrays:
+		layout.append((array.dtype.str, array.shape, size))
+		size += array.nbytes
+
+	block = shared_memory.SharedMemory(create=True, size=max(size, 1))
+	for array, (dtype, shape, offset) in zip(arrays, layout):
+		np.ndarray(shape, dtype, block.buf, offset)[...] = array
+	block.close()
+
+	return block.name, layout
+
+# copies of the arrays in a block of shared memory
+def Load(name, layout, unlink=False):
+	block = shared_memory.SharedMemory(name=name)
+	arrays = [np.ndarray(shape, dtype, block.buf, offset).copy() for dtype, shape, offset in layout]
+	block.close()
+	if unlink:
+		block.unlink()
+	return arrays
+
+# sweep one strip of the sites in shared memory (sorted by x): those in [begin, end), along with those in [low, high)
+# around them, returning (through shared memory) its cells that it can vouch for, and the sites of those it can't
+def SweepStrip(name, layout, begin, end, low, high):
+	block = shared_memory.SharedMemory(name=name)
+	sorted_xy = np.ndarray(layout[0][1], layout[0][0], block.buf, layout[0][2])
+	order = np.ndarray(layout[1][1], layout[1][0], block.buf, layout[1][2])
+
+	sites = sorted_xy[low:high].copy()
+	ids = order[low:high].astype(np.int32)
+	left = sorted_xy[low - 1, 0] if low > 0 else -np.inf
+	right = sorted_xy[high, 0] if high < len(order) else np.inf
+	everything = low == 0 and high == len(order)
+	del sorted_xy, order
+	block.close()
+
+	algorithm = FortunesAlgorithm(sites)
+	assert algorithm.RunAlgorithm(), "failed to sweep a strip"
+	L = algorithm.G
+
+	core = np.zeros(len(ids), dtype=bool)
+	core[begin - low:end - low] = True
+	owned = core & Certified(L, left, right, everything)
+
+	origin, twin, next, prev, face = L.Halfedges()
+	unowned = core & ~owned
+	around = unowned[face]
+	piece = Extract(L, ids, owned)
+	piece["uncertified"] = ids[unowned]
+	piece["neighbours"] = ids[face[twin[around]]]
+	piece["hull"] = ids[np.unique(face[origin < 0])]
+
+	names = sorted(piece)
+	return Share([piece[key] for key in names]) + (names,)
+
+def Collect(result):
+	name, layout, names = result
+	return dict(zip(names, Load(name, layout, unlink=True)))
+
+# which faces of a diagram of some of the sites are known to be exactly as they would be among all of them: those whose
+# vertices' circles lie strictly between x = left and x = right (where no other sites lie), and which don't run off to
+# infinity, unless the diagram is of all the sites
+def Certified(L, left, right, everything):
+	origin, twin, next, prev, face = L.Halfedges()
+	vertex_xy = np.append(L.Vertices(), [[np.nan, np.nan]], axis=0)[origin]
+	radius = np.sqrt(((vertex_xy - L.site_xy[face])**2).sum(axis=1))
+
+	with np.errstate(invalid="ignore"):
+		good = (vertex_xy[:, 0] - radius > left) & (vertex_xy[:, 0] + radius < right)
+	if everything:
+		good |= origin < 0
+
+	count = L.FaceCount()
+	return (np.bincount(face, minlength=count) > 0) & (np.bincount(face[~good], minlength=count) == 0)
+
+# the owned faces of a diagram of some of the sites (ids giving the site of each face), as arrays of the half-edges
+# along them, and the vertices at their ends, with faces numbered by site
+# half-edges whose twins are owned too keep their pairing (as the first 2 * pairs), and the rest, which will be paired up
+# with half-edges from other pieces, come after them with the faces of their missing twins; likewise vertices on faces
+# that aren't owned are listed with the sites round them, to be matched up with their copies in other pieces
+def Extract(L, ids, owned):
+	origin, twin, next, prev, face = L.Halfedges()
+	kept = owned[face]
+	paired = np.nonzero(kept & kept[twin])[0]
+	seam = np.nonzero(kept & ~kept[twin])[0]
+	halfedges = np.concatenate([paired, seam])
+
+	halfedge_map = np.full(len(origin) + 1, -1, dtype=np.int32)
+	halfedge_map[halfedges] = np.arange(len(halfedges))
+
+	# each vertex is the origin of a half-edge along every face round it, and the third face is across the one before
+	leaving = halfedges[origin[halfedges] >= 0]
+	vertices, first = np.unique(origin[leaving], return_index=True)
+	vertex_map = np.full(L.VertexCount() + 1, -1, dtype=np.int32)
+	vertex_map[vertices] = np.arange(len(vertices))
+
+	leaving = leaving[first]
+	around = np.stack([face[leaving], face[twin[leaving]], face[twin[prev[leaving]]]], axis=1)
+	shared = np.nonzero(~owned[around].all(axis=1))[0]
+
+	return {
+		"pairs": np.array([len(paired) // 2], dtype=np.int64),
+		"origin": vertex_map[origin[halfedges]],
+		"next": halfedge_map[next[halfedges]],
+		"prev": halfedge_map[prev[halfedges]],
+		"face": ids[face[halfedges]],
+		"twin_face": ids[face[twin[seam]]],
+		"vertex_xy": L.Vertices()[vertices],
+		"shared_vertices": shared.astype(np.int32),
+		"shared_keys": np.sort(ids[around[shared]], axis=1),
+	}
+
+# the sites (of those with the given ids) at the corners of their convex hull, by Andrew's monotone chain
+def HullSites(xy, ids):
+	ids = ids[np.lexsort((xy[ids, 1], xy[ids, 0]))]
+
+	def Chain(ids):
+		chain = []
+		for i in ids:
+			while len(chain) >= 2:
+				(ax, ay), (bx, by), (cx, cy) = xy[chain[-2]], xy[chain[-1]], xy[i]
+				if (bx - ax) * (cy - ay) - (by - ay) * (cx - ax) > 0:
+					break
+				chain.pop()
+			chain.append(i)
+		return chain
+
+	return np.array(Chain(ids)[:-1] + Chain(ids[::-1])[:-1], dtype=np.int32)
+
+# sweep the given faces again, along with their neighbours and the hull, and any sites that turn out to lie inside
+# their vertices' circles, until there are none
+def Repair(xy, sorted_xy, order, faces, neighbours, hull):
+	chosen = np.unique(np.concatenate([faces, neighbours, hull]))
+
+	while True:
+		algorithm = FortunesAlgorithm(xy[chosen])
+		assert algorithm.RunAlgorithm(), "failed to sweep the cells left over between strips"
+		L = algorithm.G
+		owned = np.isin(chosen, faces)
+
+		origin, twin, next, prev, face = L.Halfedges()
+		leaving = np.nonzero(owned[face] & (origin >= 0))[0]
+		centre = L.vertex_xy[origin[leaving]]
+		radius2 = ((centre - L.site_xy[face[leaving]])**2).sum(axis=1)
+		radius = np.sqrt(radius2)
+		low = np.searchsorted(sorted_xy[:, 0], centre[:, 0] - radius, side="left")
+		high = np.searchsorted(sorted_xy[:, 0], centre[:, 0] + radius, side="right")
+
+		intruders = []
+		for (x, y), r2, begin, end in zip(centre.tolist(), radius2.tolist(), low.tolist(), high.tolist()):
+			nearby = sorted_xy[begin:end]
+			inside = np.nonzero((nearby[:, 0] - x)**2 + (nearby[:, 1] - y)**2 < r2)[0]
+			intruders.append(order[begin + inside])
+
+		intruders = np.setdiff1d(np.concatenate(intruders + [np.zeros(0, dtype=np.int64)]), chosen)
+		if len(intruders) == 0:
+			return Extract(L, chosen.astype(np.int32), owned)
+
+		chosen = np.union1d(chosen, intruders)
+
+# put the pieces' half-edges and vertices together in G, pairing up the half-edges along faces from different pieces,
+# and merging the copies of vertices shared between them
+def Stitch(G, pieces):
+	vertex_counts = [len(piece["vertex_xy"]) for piece in pieces]
+	vertex_offsets = np.cumsum([0] + vertex_counts)
+	vertex_xy = np.concatenate([piece["vertex_xy"] for piece in pieces] + [np.zeros((0, 2))])
+
+	# every copy of a shared vertex is mapped to the first, and the rest squeezed out
+	target = np.arange(len(vertex_xy))
+	shared = np.concatenate([piece["shared_vertices"] + offset for piece, offset in zip(pieces, vertex_offsets)] +
+							[np.zeros(0, dtype=np.int64)])
+	if len(shared) > 0:
+		keys = np.concatenate([piece["shared_keys"] for piece in pieces])
+		keys, first, inverse = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+		target[shared] = shared[first[inverse.ravel()]]
+	kept = target == np.arange(len(vertex_xy))
+	vertex_map = np.append((np.cumsum(kept) - 1)[target], -1)
+
+	# the half-edges left unpaired by each piece meet their twins by the faces on either side, the one along the lower
+	# numbered face coming first in each pair
+	paired = [2 * int(piece["pairs"][0]) for piece in pieces]
+	paired_offsets = np.cumsum([0] + paired)
+	face = np.concatenate([piece["face"][count:] for piece, count in zip(pieces, paired)])
+	twin_face = np.concatenate([piece["twin_face"] for piece in pieces])
+	lower, higher = np.minimum(face, twin_face), np.maximum(face, twin_face)
+	unpaired = np.lexsort((face > twin_face, higher, lower))
+	assert len(face) % 2 == 0 and (lower[unpaired[0::2]] == lower[unpaired[1::2]]).all() and (higher[unpaired[0::2]] == higher[unpaired[1::2]]).all(), \
+		"unmatched half-edges between strips"
+	seam_ids = np.empty(len(face), dtype=np.int64)
+	seam_ids[unpaired] = paired_offsets[-1] + np.arange(len(face))
+	seam_offsets = np.cumsum([0] + [len(piece["twin_face"]) for piece in pieces])
+
+	count = paired_offsets[-1] + len(face)
+	origin = np.empty(count, dtype=np.int64)
+	next = np.empty(count, dtype=np.int64)
+	prev = np.empty(count, dtype=np.int64)
+	faces = np.empty(count, dtype=np.int64)
+
+	for index, piece in enumerate(pieces):
+		ids = np.concatenate([paired_offsets[index] + np.arange(paired[index]), seam_ids[seam_offsets[index]:seam_offsets[index + 1]], [-1]])
+		local_origin = piece["origin"].astype(np.int64)
+		origin[ids[:-1]] = vertex_map[np.where(local_origin >= 0, local_origin + vertex_offsets[index], -1)]
+		next[ids[:-1]] = ids[piece["next"]]
+		prev[ids[:-1]] = ids[piece["prev"]]
+		faces[ids[:-1]] = piece["face"]
+
+	G.Replace(vertex_xy[kept], origin, next, prev, faces)
+
+# the diagrams of many separate sets of sites, built in a pool of processes, chunksize sets at a time (by default, enough
+# for about four chunks per process)
+# the sets can be a list of (n_i, 2) arrays or lists of Points, or a (k, n, 2) array; they go to the workers packed
+# together in shared memory, and the diagrams come back the same way, packed into one PackedDiagrams (which records how
+# long it all took)
+def BatchVoronoiDiagrams(site_sets, processes=None, chunksize=None, boundary=None):
+	start = time.perf_counter()
+	site_sets = [np.asarray(sites, dtype=np.float64).reshape(-1, 2) for sites in site_sets]
+	count = len(site_sets)
+	site_offsets = np.cumsum([0] + [len(sites) for sites in site_sets]).astype(np.int64)
+	sites = np.concatenate(site_sets + [np.zeros((0, 2))])
+
+	processes = processes or os.cpu_count() or 1
+	chunksize = chunksize or max(1, -(-count // (4 * processes)))
+
+	name, layout = Share([sites, site_offsets])
+	try:
+		tasks = [(name, layout, begin, min(begin + chunksize, count), boundary) for begin in range(0, count, chunksize)]
+
+		if processes == 1 or len(tasks) <= 1:
+			results = [SweepChunk(*task) for task in tasks]
+		else:
+			with concurrent.futures.ProcessPoolExecutor(processes) as pool:
+				results = list(pool.map(SweepChunk, *zip(*tasks)))
+	finally:
+		block = shared_memory.SharedMemory(name=name)
+		block.close()
+		block.unlink()
+
+	chunks = [Collect(result) for result in results]
+	packed = PackedDiagrams(sites, site_offsets, chunks)
+
+	packed.elapsed = time.perf_counter() - start
+	packed.diagrams_per_second = count / packed.elapsed
+	return packed
+
+# sweep the sets of sites [begin, end) from shared memory, returning their diagrams packed together (through shared memory)
+# one FortunesAlgorithm is restarted for every set, so its queue, beachline and diagram storage are only set up once
+def SweepChunk(name, layout, begin, end, boundary):
+	block = shared_memory.SharedMemory(name=name)
+	sites = np.ndarray(layout[0][1], layout[0][0], block.buf, layout[0][2])
+	site_offsets = np.ndarray(layout[1][1], layout[1][0], block.buf, layout[1][2])
+	site_sets = [sites[site_offsets[i]:site_offsets[i + 1]].copy() for i in range(begin, end)]
+	del sites, site_offsets
+	block.close()
+
+	algorithm = None
+	vertex_xy, halfedges, vertex_counts, halfedge_counts = [], [], [], []
+	for sites in site_sets:
+		if algorithm == None:
+			algorithm = FortunesAlgorithm(sites, boundary)
+		else:
+			algorithm.Restart(sites)
+
+		assert algorithm.RunAlgorithm(), "failed to sweep a set of sites"
+		vertex_xy.append(algorithm.G.Vertices().copy())
+		halfedges.append(np.stack(algorithm.G.Halfedges()))
+		vertex_counts.append(algorithm.G.VertexCount())
+		halfedge_counts.append(algorithm.G.HalfedgeCount())
+
+	piece = {
+		"vertex_xy": np.concatenate(vertex_xy + [np.zeros((0, 2))]),
+		"halfedges": np.concatenate(halfedges + [np.zeros((5, 0), dtype=np.int32)], axis=1),
+		"vertex_counts": np.array(vertex_counts, dtype=np.int64),
+		"halfedge_counts": np.array(halfedge_counts, dtype=np.int64),
+	}
+	names = sorted(piece)
+	return Share([piece[key] for key in names]) + (names,)
+
+# many voronoi diagrams packed end to end in shared arrays, with offset tables: diagram i has the sites
+# site_xy[site_offsets[i]:site_offsets[i + 1]], and likewise the vertices and half-edges between vertex_offsets and
+# halfedge_offsets; ids within each diagram (origin, twin, next, prev and face, which is also the site) are its own,
+# counting from 0, as in a VoronoiDiagram
+class PackedDiagrams:
+	def __init__(self, site_xy, site_offsets, chunks):
+		self.site_xy = site_xy
+		self.site_offsets = site_offsets
+
+		# wall time of the BatchVoronoiDiagrams call that built these (in seconds), and the diagrams it made per second
+		self.elapsed = None
+		self.diagrams_per_second = None
+
+		vertex_counts = np.concatenate([chunk["vertex_counts"] for chunk in chunks] + [np.zeros(0, dtype=np.int64)])
+		halfedge_counts = np.concatenate([chunk["halfedge_counts"] for chunk in chunks] + [np.zeros(0, dtype=np.int64)])
+		self.vertex_offsets = np.append(0, np.cumsum(vertex_counts))
+		self.halfedge_offsets = np.append(0, np.cumsum(halfedge_counts))
+
+		self.vertex_xy = np.concatenate([chunk["vertex_xy"] for chunk in chunks] + [np.zeros((0, 2))])
+		halfedges = np.concatenate([chunk["halfedges"] for chunk in chunks] + [np.zeros((5, 0), dtype=np.int32)], axis=1)
+		self.origin, self.twin, self.next, self.prev, self.face = halfedges
+
+	def __len__(self):
+		return len(self.site_offsets) - 1
+
+	# diagram i, unpacked into a VoronoiDiagram of its own
+	def Diagram(self, i):
+		sites = slice(self.site_offsets[i], self.site_offsets[i + 1])
+		vertices = slice(self.vertex_offsets[i], self.vertex_offsets[i + 1])
+		halfedges = slice(self.halfedge_offsets[i], self.halfedge_offsets[i + 1])
+
+		G = Graphs.VoronoiDiagram(self.site_xy[sites])
+		G.Replace(self.vertex_xy[vertices], self.origin[halfedges], self.next[halfedges], self.prev[halfedges], self.face[halfedges])
+		return G
@@ -1,7 +1,6 @@
+from collections import namedtuple
 
 # 2d point, pretty self-explanatory
-class Point:
-	def __init__(self, x, y):
-		self.x = x
-		self.y = y
-
+# an immutable (x, y) pair with no per-instance dict, which unpacks, compares and hashes like a tuple
+class Point(namedtuple("Point", ["x", "y"])):
+	__slots__ = ()
@@ -0,0 +1,117 @@
+import numpy as np
+
+# number of query points walked at once by LocateAll, which bounds the size of its temporary arrays
+CHUNK_SIZE = 1 << 18
+
+
+# answers "which cell is this point in?" for a finished (unclipped) VoronoiDiagram, by a greedy walk over the delaunay
+# graph of its sites: from any site, stepping to whichever neighbour is nearest the query point, until none is nearer,
+# always ends at the nearest site, whose face is the cell holding the point (face i belongs to site i)
+# walks start from the nearest site to the centre of a grid bucket round the query point, found when the index is
+# built, so each takes an expected O(1) steps on well spread sites
+# clipping drops the adjacencies of cells that meet outside the boundary, which can leave walks stuck, so build the
+# locator before clipping
+class PointLocator:
+	def __init__(self, G):
+		assert len(G.site_xy) > 0, "no sites to locate"
+		self.site_x = np.ascontiguousarray(G.site_xy[:, 0])
+		self.site_y = np.ascontiguousarray(G.site_xy[:, 1])
+		self.indptr, self.indices = G.Adjacency()
+
+		# sites with no neighbours are repeats (or alone), so walks never start from them
+		live = np.nonzero(np.diff(self.indptr) > 0)[0]
+		if len(live) == 0:
+			live = np.zeros(1, dtype=np.int64)
+
+		# a 2^k x 2^k grid over the sites' bounding box, with at least one bucket per site
+		self.left, self.bottom = self.site_x[live].min(), self.site_y[live].min()
+		self.right, self.top = self.site_x[live].max(), self.site_y[live].max()
+		self.levels = int(np.ceil(np.log2(len(live)) / 2))
+		self.start = self.__BuildGrid(live[0])
+
+	# the nearest site to the centre of every bucket, found level by level (each bucket walking from its parent's answer)
+	def __BuildGrid(self, site):
+		start = np.full((1, 1), site, dtype=np.int64)
+
+		for level in range(self.levels + 1):
+			size = 1 << level
+			if level > 0:
+				start = np.repeat(np.repeat(start, 2, axis=0), 2, axis=1)
+
+			X, Y = self.__BucketCentres(size)
+			start = self.__Walk(X.ravel(), Y.ravel(), start.ravel()).reshape(size, size)
+
+		return start
+
+	def __BucketCentres(self, size):
+		width = (self.right - self.left) / size
+		height = (self.top - self.bottom) / size
+		return np.meshgrid(self.left + (np.arange(size) + 0.5) * width, self.bottom + (np.arange(size) + 0.5) * height)
+
+	# the bucket (row, column) of each query point, with points off the grid put in the nearest bucket
+	def __Buckets(self, X, Y):
+		size = 1 << self.levels
+		width = (self.right - self.left) / size or 1.0
+		height = (self.top - self.bottom) / size or 1.0
+		column = np.clip(((X - self.left) / width).astype(np.int64), 0, size - 1)
+		row = np.clip(((Y - self.bottom) / height).astype(np.int64), 0, size - 1)
+		return row, column
+
+	# greedy walks for a batch of query points at once, from the given sites, returning the sites they end at
+	# every step gathers all of the current sites' neighbours into one flat array, with the minimum for each walk
+	# found by a segmented reduction
+	def __Walk(self, X, Y, current):
+		current = current.copy()
+		best = (self.site_x[current] - X)**2 + (self.site_y[current] - Y)**2
+		walking = np.nonzero(np.diff(self.indptr)[current] > 0)[0]
+
+		while len(walking) > 0:
+			sites = current[walking]
+			first = self.indptr[sites]
+			degree = self.indptr[sites + 1] - first
+			offset = np.cumsum(degree) - degree
+
+			walk = np.repeat(np.arange(len(walking)), degree)
+			neighbours = self.indices[np.repeat(first - offset, degree) + np.arange(degree.sum())]
+			distance = (self.site_x[neighbours] - X[walking][walk])**2 + (self.site_y[neighbours] - Y[walking][walk])**2
+
+			# the first neighbour at the minimum distance, for each walk
+			nearest = np.minimum.reduceat(distance, offset)
+			at_minimum = np.nonzero(distance == nearest[walk])[0]
+			at_minimum = at_minimum[np.append(True, walk[at_minimum[1:]] != walk[at_minimum[:-1]])]
+
+			moved = nearest < best[walking]
+			walking = walking[moved]
+			current[walking] = neighbours[at_minimum[moved]]
+			best[walking] = nearest[moved]
+
+		return current
+
+	# the face holding the point (x, y)
+	def Locate(self, x, y):
+		row, column = self.__Buckets(np.array([x]), np.array([y]))
+		site = self.start[row[0], column[0]]
+		best = (self.site_x[site] - x)**2 + (self.site_y[site] - y)**2
+
+		while True:
+			neighbours = self.indices[self.indptr[site]:self.indptr[site + 1]]
+			distance = (self.site_x[neighbours] - x)**2 + (self.site_y[neighbours] - y)**2
+
+			if len(neighbours) == 0 or distance.min() >= best:
+				return site
+
+			site = neighbours[distance.argmin()]
+			best = distance.min()
+
+	# the face holding each row of an (M, 2) array of points, as an int64 array of length M
+	def LocateAll(self, points, chunk_size=CHUNK_SIZE):
+		points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+		faces = np.empty(len(points), dtype=np.int64)
+
+		for begin in range(0, len(points), chunk_size):
+			X = points[begin:begin + chunk_size, 0]
+			Y = points[begin:begin + chunk_size, 1]
+			row, column = self.__Buckets(X, Y)
+			faces[begin:begin + chunk_size] = self.__Walk(X, Y, self.start[row, column])
+
+		return faces
@@ -0,0 +1,165 @@
+# geometric predicates which always give the right answer for the (floating point) coordinates they are given
+# each works its answer out in floating point first, together with a bound on the rounding error it can have picked up
+# (after Shewchuk's "adaptive precision floating-point arithmetic and fast robust geometric predicates"), and only when
+# the result is too close to zero to be sure of its sign does it start again in exact integer arithmetic
+# every float is an integer over a power of two, so scaling all of a predicate's inputs by the largest of their
+# denominators makes integers of them, and (as each predicate is a homogeneous polynomial in its inputs) keeps its sign
+# the sweep uses Orientation (to detect circle events) and BreakpointSide (to locate arcs on the beachline)
+
+# half the gap between 1 and the next float above it, i.e. the relative error of a single rounding
+EPSILON = 2.0**-53
+
+# the error bounds, relative to the sum of the magnitudes of the terms added up in each determinant
+ORIENTATION_BOUND = (3 + 16 * EPSILON) * EPSILON
+INCIRCLE_BOUND = (10 + 96 * EPSILON) * EPSILON
+
+# a little more than the roundings which each term of the quadratic (seven) and the vertex test (four) can pass through
+QUADRATIC_BOUND = (8 + 64 * EPSILON) * EPSILON
+VERTEX_BOUND = (5 + 32 * EPSILON) * EPSILON
+MIDPOINT_BOUND = (3 + 16 * EPSILON) * EPSILON
+
+
+def Sign(value):
+	return 1 if value > 0 else -1 if value < 0 else 0
+
+# the values, exactly, as integers over a common denominator
+def Integers(*values):
+	ratios = [value.as_integer_ratio() for value in values]
+	scale = max(denominator for _, denominator in ratios)
+	return [numerator * (scale // denominator) for numerator, denominator in ratios]
+
+# +1 if the points a, b, c turn counterclockwise, -1 if clockwise, and 0 if they lie on a line
+def Orientation(a, b, c):
+	left = (a.x - c.x) * (b.y - c.y)
+	right = (a.y - c.y) * (b.x - c.x)
+	determinant = left - right
+
+	if abs(determinant) > ORIENTATION_BOUND * (abs(left) + abs(right)):
+		return Sign(determinant)
+
+	return ExactOrientation(a, b, c)
+
+def ExactOrientation(a, b, c):
+	ax, ay, bx, by, cx, cy = Integers(a.x, a.y, b.x, b.y, c.x, c.y)
+	return Sign((ax - cx) * (by - cy) - (ay - cy) * (bx - cx))
+
+# +1 if the point d lies inside the circle through a, b, c, -1 if outside, and 0 if on it, given that a, b, c turn
+# counterclockwise (with the signs reversed if they turn clockwise)
+def InCircle(a, b, c, d):
+	adx, ady = a.x - d.x, a.y - d.y
+	bdx, bdy = b.x - d.x, b.y - d.y
+	cdx, cdy = c.x - d.x, c.y - d.y
+
+	alift = adx * adx + ady * ady
+	blift = bdx * bdx + bdy * bdy
+	clift = cdx * cdx + cdy * cdy
+
+	determinant = (alift * (bdx * cdy - cdx * bdy) + blift * (cdx * ady - adx * cdy) + clift * (adx * bdy - bdx * ady))
+	permanent = ((abs(bdx * cdy) + abs(cdx * bdy)) * alift + (abs(cdx * ady) + abs(adx * cdy)) * blift +
+				 (abs(adx * bdy) + abs(bdx * ady)) * clift)
+
+	if abs(determinant) > INCIRCLE_BOUND * permanent:
+		return Sign(determinant)
+
+	return ExactInCircle(a, b, c, d)
+
+def ExactInCircle(a, b, c, d):
+	ax, ay, bx, by, cx, cy, dx, dy = Integers(a.x, a.y, b.x, b.y, c.x, c.y, d.x, d.y)
+	adx, ady = ax - dx, ay - dy
+	bdx, bdy = bx - dx, by - dy
+	cdx, cdy = cx - dx, cy - dy
+
+	return Sign((adx * adx + ady * ady) * (bdx * cdy - cdx * bdy) + (bdx * bdx + bdy * bdy) * (cdx * ady - adx * cdy) +
+				(cdx * cdx + cdy * cdy) * (adx * bdy - bdx * ady))
+
+# which side of the breakpoint between the arcs with foci p (on the left) and q (on the right) x lies, for the given
+# directrix: -1 to the left, +1 to the right, and 0 on it, taking the breakpoint to be just as Arc.Breakpoint has it
+#
+# with h1, h2 the heights of the foci above the directrix, the difference of the two parabolae scaled by 2 h1 h2 is
+#   G(x) = h2 (x - x1)^2 - h1 (x - x2)^2 + h1 h2 (y1 - y2)
+# which is negative where p's arc is the lower, and has its vertex at xv = (h2 x1 - h1 x2) / (y2 - y1), between its two
+# roots; the breakpoint is the root on the far side of the vertex from the lower focus, so the sign of G settles the
+# question on that side, and the vertex does on the other
+def BreakpointSide(x, p, q, directrix):
+	x1, y1 = p
+	x2, y2 = q
+
+	# a focus on the directrix is its own breakpoint, and foci at equal heights meet on their bisector
+	if y1 == directrix:
+		if y2 == directrix:
+			return MidpointSide(x, x1, x2)
+		return Sign(x - x1)
+
+	if y2 == directrix:
+		return Sign(x - x2)
+
+	if y1 == y2:
+		assert x1 != x2, "Intersected a parabola with itself"
+		return MidpointSide(x, x1, x2)
+
+	g = QuadraticSign(x, x1, y1, x2, y2, directrix)
+
+	# p's focus is the lower (and its arc the narrower): the breakpoint is the right-hand root, so x is to its right
+	# exactly where G is positive on the right of the vertex
+	if y1 < y2:
+		if g < 0:
+			return -1
+		return g if VertexSign(x, x1, y1, x2, y2, directrix) > 0 else -1
+
+	# q's focus is the lower: the breakpoint is the left-hand root, and G is positive between the roots
+	if g > 0:
+		return 1
+	return 1 if VertexSign(x, x1, y1, x2, y2, directrix) > 0 else g
+
+# the sign of x - (x1 + x2) / 2
+def MidpointSide(x, x1, x2):
+	difference = 2 * x - x1 - x2
+
+	if abs(difference) > MIDPOINT_BOUND * (abs(2 * x) + abs(x1) + abs(x2)):
+		return Sign(difference)
+
+	return ExactMidpointSide(x, x1, x2)
+
+def ExactMidpointSide(x, x1, x2):
+	x, x1, x2 = Integers(x, x1, x2)
+	return Sign(2 * x - x1 - x2)
+
+# the sign of G(x), as above
+def QuadraticSign(x, x1, y1, x2, y2, directrix):
+	h1 = y1 - directrix
+	h2 = y2 - directrix
+	dx1 = x - x1
+	dx2 = x - x2
+
+	left = h2 * dx1 * dx1
+	right = h1 * dx2 * dx2
+	offset = h1 * h2 * (y1 - y2)
+	G = left - right + offset
+
+	if abs(G) > QUADRATIC_BOUND * (abs(left) + abs(right) + abs(offset)):
+		return Sign(G)
+
+	return ExactQuadraticSign(x, x1, y1, x2, y2, directrix)
+
+def ExactQuadraticSign(x, x1, y1, x2, y2, directrix):
+	x, x1, y1, x2, y2, directrix = Integers(x, x1, y1, x2, y2, directrix)
+	h1 = y1 - directrix
+	h2 = y2 - directrix
+	return Sign(h2 * (x - x1)**2 - h1 * (x - x2)**2 + h1 * h2 * (y1 - y2))
+
+# the sign of x - xv, as above
+def VertexSign(x, x1, y1, x2, y2, directrix):
+	scaled = x * (y2 - y1)
+	left = (y2 - directrix) * x1
+	right = (y1 - directrix) * x2
+	V = scaled - (left - right)
+
+	if abs(V) > VERTEX_BOUND * (abs(scaled) + abs(left) + abs(right)):
+		return Sign(V) if y2 > y1 else -Sign(V)
+
+	return ExactVertexSign(x, x1, y1, x2, y2, directrix)
+
+def ExactVertexSign(x, x1, y1, x2, y2, directrix):
+	x, x1, y1, x2, y2, directrix = Integers(x, x1, y1, x2, y2, directrix)
+	V = x * (y2 - y1) - (y2 - directrix) * x1 + (y1 - directrix) * x2
+	return Sign(V) if y2 > y1 else -Sign(V)
@@ -1,20 +1,74 @@
+import heapq
+import itertools
 
+# never bother compacting heaps smaller than this
+MIN_COMPACTION_SIZE = 64
+
+
+# binary min-heap, ordered by key_fn(element) and then by insertion order, so that ties pop deterministically
+# elements must carry a boolean `valid` attribute; invalidated elements are left in the heap as tombstones,
+# skipped over when popped, and swept out in bulk whenever they outnumber the live elements
 class PriorityQueue:
-    def __init__(self, init_list=[], sort_fn=None):
-        
-        self.queue = init_list
+    def __init__(self, init_list=None, key_fn=lambda element : element):
+
+        self.key_fn = key_fn
+        self.queue = []
+        self.reset(init_list)
+
+    # empty the queue and refill it with the given elements, reusing its list
+    def reset(self, init_list=None):
+        self.counter = itertools.count()
+        self.tombstones = 0
+
+        if init_list == None:
+            init_list = []
+
+        # heap entries are (key, insertion number, element), so elements themselves are never compared
+        self.queue[:] = [(self.key_fn(element), next(self.counter), element) for element in init_list]
+        heapq.heapify(self.queue)
+
+    # number of live (not invalidated) elements
+    def __len__(self):
+        return len(self.queue) - self.tombstones
 
-        if sort_fn != None:
-            self.queue.sort(key=sort_fn)
-    
     def is_empty(self):
-        return len(self.queue) == 0
+        return len(self) == 0
 
+    # remove and return the live element with the smallest key
     def pop(self):
-        return self.queue.pop()
-    
-    def insert(self, element, priority=0):
-        self.queue.insert(priority, element)
+        while True:
+            element = heapq.heappop(self.queue)[2]
+
+            if element.valid:
+                return element
+
+            self.tombstones -= 1
+
+    # return, without removing, the live element with the smallest key
+    def peek(self):
+        while not self.queue[0][2].valid:
+            heapq.heappop(self.queue)
+            self.tombstones -= 1
+
+        return self.queue[0][2]
+
+    def insert(self, element):
+        heapq.heappush(self.queue, (self.key_fn(element), next(self.counter), element))
+
+    # lazily cancel an element that is still waiting in the queue
+    def invalidate(self, element):
+
+        if not element.valid:
+            return
 
+        element.valid = False
+        self.tombstones += 1
 
+        if len(self.queue) >= MIN_COMPACTION_SIZE and 2 * self.tombstones > len(self.queue):
+            self.compact()
 
+    # drop every tombstone and restore the heap property, in O(n)
+    def compact(self):
+        self.queue = [entry for entry in self.queue if entry[2].valid]
+        heapq.heapify(self.queue)
+        self.tombstones = 0
@@ -0,0 +1,43 @@
+import time
+
+import numpy as np
+
+from FortunesAlgorithm import FortunesAlgorithm
+
+
+# lloyd relaxation of a set of sites within a Boundary: each step builds the (clipped) diagram of the sites, and moves
+# every site to the centroid of its cell, which converges on a centroidal voronoi tessellation
+# the sweep's queue and the diagram's storage are kept from one step to the next, and the sites are moved in place
+class LloydRelaxation:
+	def __init__(self, sites, boundary):
+		self.algorithm = FortunesAlgorithm(sites, boundary)
+		self.G = self.algorithm.G
+		self.sites = self.G.site_xy.copy()
+
+		# wall time of each step so far, in seconds
+		self.step_times = []
+
+	# build the diagram of the sites as they are, and move them on to its centroids (sites whose cells miss the boundary
+	# altogether staying put), returning the furthest that any of them moved
+	# afterwards G is the diagram of the sites before the move, and sites holds where they moved to
+	def Step(self):
+		start = time.perf_counter()
+
+		self.algorithm.Restart(self.sites)
+		assert self.algorithm.RunAlgorithm(), "sweep failed during relaxation"
+
+		area, centroid = self.G.Centroids()
+		moved = area > 0
+		distance = np.sqrt(((centroid[moved] - self.sites[moved])**2).sum(axis=1))
+		self.sites[moved] = centroid[moved]
+
+		self.step_times.append(time.perf_counter() - start)
+		return distance.max() if len(distance) > 0 else 0.0
+
+	# step until no site moves further than tolerance, or for at most max_iterations steps, returning the number taken
+	def Run(self, tolerance=1e-6, max_iterations=100):
+		for iteration in range(1, max_iterations + 1):
+			if self.Step() < tolerance:
+				return iteration
+
+		return max_iterations
@@ -1,8 +1,182 @@
+import functools
+
+import numpy as np
+
 from Boundary import RectangularBoundary as rect
 from Boundary import CircularBoundary as circ
-from Point import Point
 
+# number of sites in each chunk yielded by RandomSiteChunks, unless told otherwise
+CHUNK_SIZE = 1 << 20
+
+
+# n sites drawn uniformly at random from inside the boundary (by default the unit square), as a contiguous (n, 2) float64 array
+# the same seed always gives the same sites
+def RandomSites(boundary, n, seed=None):
+	if boundary == None:
+		boundary = rect()
+
+	rng = np.random.default_rng(seed)
+	return boundary.Sample(rng, n)
+
+
+# as RandomSites, but yielding the sites a chunk_size at a time (the last chunk may be short), for runs too big to hold at once
+# the chunks join up to exactly RandomSites(boundary, n, seed)
+def RandomSiteChunks(boundary, n, seed=None, chunk_size=CHUNK_SIZE):
+	if boundary == None:
+		boundary = rect()
+
+	rng = np.random.default_rng(seed)
+
+	for start in range(0, n, chunk_size):
+		yield boundary.Sample(rng, min(chunk_size, n - start))
+
+
+# roughly how many sites per unit area a (maximal) poisson-disk sample with the given minimum spacing ends up with
+POISSON_DISK_DENSITY = 0.69
+
+# neighbouring grid cells that can hold a point within one radius of a point in the middle cell (those two cells away, but not diagonally)
+NEIGHBOURS = [(di, dj) for di in range(-2, 3) for dj in range(-2, 3) if (di, dj) != (0, 0) and abs(di) + abs(dj) < 4]
+
+# each grid cell is split into SUBDIVISIONS x SUBDIVISIONS squares, whose coverage is tracked in the bits of a uint16
+SUBDIVISIONS = 4
+
+# lookup tables giving the number of set bits in a uint16, and the position of the k-th set bit (1 MB, so they are only
+# built when PoissonDiskSites is first called)
+@functools.lru_cache(maxsize=None)
+def BitTables():
+	masks = np.arange(1 << 16)
+	bit_count = np.zeros(1 << 16, dtype=np.uint8)
+	bit_select = np.zeros((1 << 16, 16), dtype=np.uint8)
+
+	for bit in range(16):
+		has_bit = (masks >> bit) & 1 == 1
+		bit_select[has_bit, bit_count[has_bit]] = bit
+		bit_count += has_bit
+
+	return bit_count, bit_select
+
+
+# the spacing to ask PoissonDiskSites for, to get about n sites inside the boundary
+def PoissonDiskRadius(boundary, n):
+	if boundary == None:
+		boundary = rect()
+
+	return np.sqrt(POISSON_DISK_DENSITY * boundary.Area() / n)
+
+
+# blue-noise sites inside the boundary, no two closer than radius, as an (n, 2) float64 array; the same seed gives the same sites
+# the bounding box is covered by a grid of cells of side radius/sqrt(2), so each cell holds at most one site. cells are split into
+# 9 phases by (row % 3, column % 3): cells in the same phase are 3 apart, so darts thrown in them can't clash with one another,
+# only with sites already accepted in the 20 surrounding cells, and a whole phase is tested at once with array operations
+# each cell also tracks which of its SUBDIVISIONS^2 sub-squares are still uncovered by the disk of some single nearby site,
+# darts only land in uncovered sub-squares, and a cell closes once it holds a site or all of its sub-squares are covered
+def PoissonDiskSites(boundary, radius, seed=None, attempts=30):
+	if boundary == None:
+		boundary = rect()
+
+	rng = np.random.default_rng(seed)
+	bit_count, bit_select = BitTables()
+	left, bottom, right, top = boundary.BoundingBox()
+	cell = radius / np.sqrt(2)
+	sub = cell / SUBDIVISIONS
+	columns = max(int(np.ceil((right - left) / cell)), 1)
+	rows = max(int(np.ceil((top - bottom) / cell)), 1)
+
+	# site coordinates per cell (nan when empty), padded by two cells all round so neighbour lookups never fall off the edge
+	X = np.full((rows + 4, columns + 4), np.nan)
+	Y = np.full((rows + 4, columns + 4), np.nan)
+
+	# bit b of uncovered[j, i] is set while sub-square b (at column b % SUBDIVISIONS, row b // SUBDIVISIONS) of the cell is open
+	# cells with all four corners inside the (convex) boundary start fully open, and cells straddling it get just the
+	# sub-squares overlapping it (judged by their corners and centres)
+	uncovered = np.zeros((rows + 4, columns + 4), dtype=np.int64)
+	corners = np.stack(np.meshgrid(left + np.arange(columns + 1) * cell, bottom + np.arange(rows + 1) * cell), axis=-1)
+	inside = boundary.Contains(corners.reshape(-1, 2)).reshape(rows + 1, columns + 1)
+	inside_corners = inside[:-1, :-1].astype(int) + inside[1:, :-1] + inside[:-1, 1:] + inside[1:, 1:]
+	uncovered[2:-2, 2:-2][inside_corners == 4] = (1 << SUBDIVISIONS**2) - 1
+
+	# sub-square offsets from the corner of their cell
+	offset_x = (np.arange(SUBDIVISIONS**2) % SUBDIVISIONS) * sub
+	offset_y = (np.arange(SUBDIVISIONS**2) // SUBDIVISIONS) * sub
+
+	# points at the corners and centre of a sub-square, relative to its own corner
+	probes = np.array([(0, 0), (0, 1), (1, 0), (1, 1), (0.5, 0.5)]) * sub
+
+	J, I = np.nonzero(inside_corners < 4)
+	for b in range(SUBDIVISIONS**2):
+		overlaps = np.zeros(len(J), dtype=bool)
+
+		for u, v in probes:
+			points = np.stack([left + I * cell + offset_x[b] + u, bottom + J * cell + offset_y[b] + v], axis=1)
+			overlaps |= boundary.Contains(points)
+
+		uncovered[J[overlaps] + 2, I[overlaps] + 2] |= 1 << b
+
+	# a new site at (x, y) within its cell covers sub-square (bx, by) of the cell (di, dj) away when the furthest corners
+	# in x and y are both in reach; these are the squared distances to those corners, per column (or row) of sub-squares
+	# (single precision is plenty here, and halves the work on the largest arrays)
+	reach = (np.arange(-2, 3)[:, None] * cell + np.arange(SUBDIVISIONS) * sub).astype(np.float32)
+	def FurthestCorner(offset):
+		near = reach - offset.astype(np.float32)[:, None, None]
+		return np.maximum(near**2, (near + np.float32(sub))**2)
+
+	# flat-index offsets of the neighbouring cells, so each phase can gather all its neighbours at once as an (m, 20) array
+	width = columns + 4
+	neighbours = np.array([dj * width + di for di, dj in NEIGHBOURS])
+	flat_X = X.ravel()
+	flat_Y = Y.ravel()
+	flat_uncovered = uncovered.ravel()
+
+	for attempt in range(attempts):
+		for phase_j in range(3):
+			for phase_i in range(3):
+				j, i = np.nonzero(uncovered[phase_j + 2:-2:3, phase_i + 2:-2:3])
+
+				if len(j) == 0:
+					continue
+
+				cells = (3 * j + phase_j + 2) * width + 3 * i + phase_i + 2
+				corner_x = left + (cells % width - 2) * cell
+				corner_y = bottom + (cells // width - 2) * cell
+
+				# one dart per open cell, in a random open sub-square
+				masks = flat_uncovered[cells]
+				darts = rng.random((len(cells), 3))
+				b = bit_select[masks, (darts[:, 0] * bit_count[masks]).astype(np.int64)].astype(np.int64)
+				x = corner_x + offset_x[b] + darts[:, 1] * sub
+				y = corner_y + offset_y[b] + darts[:, 2] * sub
+
+				# kept only if it is inside the boundary and clear of every nearby site (comparisons with nan are False)
+				nearby_x = flat_X[cells[:, None] + neighbours]
+				nearby_y = flat_Y[cells[:, None] + neighbours]
+				clear = ~((nearby_x - x[:, None])**2 + (nearby_y - y[:, None])**2 < radius**2).any(axis=1)
+				accept = clear & boundary.Contains(np.stack([x, y], axis=1))
+
+				# a sub-square that a dart has failed in, with its corners and centre each inside some nearby disk, is taken
+				# to be covered (a slight under-estimate of the space left, which can only make the sample a little sparser)
+				failed = ~clear
+				probe_x = (corner_x + offset_x[b])[failed, None] + probes[:, 0]
+				probe_y = (corner_y + offset_y[b])[failed, None] + probes[:, 1]
+				reached = ((nearby_x[failed, :, None] - probe_x[:, None, :])**2 +
+						   (nearby_y[failed, :, None] - probe_y[:, None, :])**2 < radius**2).any(axis=1).all(axis=1)
+				flat_uncovered[cells[failed][reached]] &= ~(1 << b[failed][reached])
+
+				cells, x, y = cells[accept], x[accept], y[accept]
+				flat_X[cells] = x
+				flat_Y[cells] = y
+				flat_uncovered[cells] = 0
+
+				# close off the sub-squares of surrounding cells that now lie wholly inside the new sites' disks, packing
+				# the (cell row, cell column, sub-square row, sub-square column) coverage into one mask per cell
+				# (for a fixed offset the cells are all distinct, as the new sites are 3 cells apart)
+				far_x = FurthestCorner(x - corner_x[accept])
+				far_y = FurthestCorner(y - corner_y[accept])
+				covered = far_y[:, :, None, :, None] + far_x[:, None, :, None, :] < np.float32(radius**2)
+				covered = covered.reshape(len(cells), 25, SUBDIVISIONS**2)
+				masks = np.packbits(covered, axis=-1, bitorder="little").view(np.uint16).reshape(len(cells), 5, 5)
+
+				for (di, dj), neighbour in zip(NEIGHBOURS, neighbours):
+					flat_uncovered[cells + neighbour] &= ~masks[:, dj + 2, di + 2].astype(np.int64)
 
-def RandomSites(boundary):
-	# TODO
-	return [Point(0,0)]
\ No newline at end of file
+	filled = ~np.isnan(X)
+	return np.stack([X[filled], Y[filled]], axis=1)
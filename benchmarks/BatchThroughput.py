@@ -0,0 +1,50 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+from FortunesAlgorithm import FortunesAlgorithm
+from ParallelSweep import BatchVoronoiDiagrams
+
+
+def main():
+	parser = argparse.ArgumentParser(description="many small diagrams with BatchVoronoiDiagrams, against building them one at a time")
+	parser.add_argument("--diagrams", type=int, default=2000)
+	parser.add_argument("--sites", type=int, default=100, help="sites per diagram")
+	parser.add_argument("--processes", type=int, nargs="+", default=[1, os.cpu_count() or 1])
+	parser.add_argument("--chunksize", type=int, default=None)
+	parser.add_argument("--seed", type=int, default=0)
+	args = parser.parse_args()
+
+	rng = np.random.default_rng(args.seed)
+	site_sets = rng.random((args.diagrams, args.sites, 2))
+	print(f"{args.diagrams} diagrams of {args.sites} sites, {os.cpu_count()} cpus")
+
+	start = time.perf_counter()
+	for sites in site_sets:
+		FortunesAlgorithm(sites).RunAlgorithm()
+	single = time.perf_counter() - start
+	print(f"  one at a time, built afresh     {single:>8.2f} s  ({args.diagrams / single:,.0f} diagrams/s)")
+
+	# as SweepChunk does: one FortunesAlgorithm, restarted for each set
+	start = time.perf_counter()
+	algorithm = FortunesAlgorithm(site_sets[0])
+	for sites in site_sets:
+		algorithm.Restart(sites)
+		algorithm.RunAlgorithm()
+	reused = time.perf_counter() - start
+	print(f"  one at a time, restarted        {reused:>8.2f} s  ({args.diagrams / reused:,.0f} diagrams/s, {single / reused:.2f}x)")
+
+	print(f"{'processes':>10} {'time (s)':>10} {'diagrams/s':>11} {'speedup':>8}")
+	for processes in args.processes:
+		packed = BatchVoronoiDiagrams(site_sets, processes=processes, chunksize=args.chunksize)
+
+		assert len(packed) == args.diagrams
+		print(f"{processes:>10} {packed.elapsed:>10.2f} {packed.diagrams_per_second:>11,.0f} {single / packed.elapsed:>8.2f}")
+		sys.stdout.flush()
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,66 @@
+import argparse
+import math
+import random
+import sys
+
+import numpy as np
+
+from BeachLine import Arc
+from benchmarks import Best
+from benchmarks.Suite import HalfwaySweep, Sites
+import Instrumentation
+
+
+# GetArcAbove as it was before arcs cached their breakpoints, working both out afresh at every level of the descent
+def UncachedArcAbove(beachline, x, sweepline):
+	arc = beachline.root
+
+	while True:
+		left = arc.previous.Breakpoint(arc, sweepline) if arc.previous != None else -math.inf
+		right = arc.Breakpoint(arc.next, sweepline) if arc.next != None else math.inf
+
+		if x < left:
+			arc = arc.left
+		elif x >= right:
+			arc = arc.right
+		else:
+			return arc
+
+# best wall time per query of a few passes of queries at the fixed sweepline, with the calls to Arc.Breakpoint made by
+# all the passes together
+def Queries(search, X, sweepline, repeat):
+	Instrumentation.Reset()
+	best = Best(lambda: [search(x, sweepline) for x in X], repeat) / len(X)
+	return best, Instrumentation.counters["breakpoints"]
+
+
+def main():
+	parser = argparse.ArgumentParser(description="repeated GetArcAbove queries at a fixed sweepline, with arcs caching their breakpoints and without")
+	parser.add_argument("--sites", type=int, nargs="+", default=[10**3, 10**4, 10**5])
+	parser.add_argument("--queries", type=int, default=10**4)
+	parser.add_argument("--repeat", type=int, default=3)
+	parser.add_argument("--seed", type=int, default=0)
+	args = parser.parse_args()
+
+	print(f"{'sites':>8} {'arcs':>7} {'uncached (us)':>14} {'breakpoints':>12} {'cached (us)':>12} {'breakpoints':>12} {'speedup':>8}")
+	for n in args.sites:
+		rng = random.Random(args.seed)
+		beachline, sweepline = HalfwaySweep(Sites("uniform", n, np.random.default_rng(args.seed)))
+		X = [rng.random() for _ in range(args.queries)]
+
+		# only Breakpoint is wrapped (here, rather than by Instrumentation.Enable), so that both searches are counted alike
+		original = Arc.__dict__["Breakpoint"]
+		Arc.Breakpoint = Instrumentation.Counted(original, "breakpoints")
+		try:
+			uncached, uncached_calls = Queries(lambda x, y: UncachedArcAbove(beachline, x, y), X, sweepline, args.repeat)
+			cached, cached_calls = Queries(beachline.GetArcAbove, X, sweepline, args.repeat)
+		finally:
+			Arc.Breakpoint = original
+
+		print(f"{n:>8} {beachline.arc_count:>7} {uncached * 1e6:>14.2f} {uncached_calls:>12} {cached * 1e6:>12.2f} "
+			  f"{cached_calls:>12} {uncached / cached:>7.1f}x")
+		sys.stdout.flush()
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,33 @@
+import argparse
+import collections
+import sys
+
+from benchmarks import Best
+from FortunesAlgorithm import FortunesAlgorithm
+import SiteGenerator
+
+
+
+def main():
+	parser = argparse.ArgumentParser(description="cost of following a sweep through FortunesAlgorithm.Stream(), against RunAlgorithm")
+	parser.add_argument("--sites", type=int, default=10**5)
+	parser.add_argument("--repeat", type=int, default=3)
+	parser.add_argument("--seed", type=int, default=0)
+	args = parser.parse_args()
+
+	sites = SiteGenerator.RandomSites(None, args.sites, seed=args.seed)
+
+	plain = Best(lambda algorithm: algorithm.RunAlgorithm(), args.repeat, lambda: FortunesAlgorithm(sites))
+	drained = Best(lambda algorithm: collections.deque(algorithm.Stream(), maxlen=0), args.repeat, lambda: FortunesAlgorithm(sites))
+	counted = collections.Counter()
+	kept = Best(lambda algorithm: counted.update(record.kind for record in algorithm.Stream()), args.repeat, lambda: FortunesAlgorithm(sites))
+
+	print(f"{args.sites} sites, best of {args.repeat}")
+	print(f"  RunAlgorithm                {plain:>8.3f} s")
+	print(f"  Stream, records dropped     {drained:>8.3f} s  ({drained / plain - 1:+.1%})")
+	print(f"  Stream, records counted     {kept:>8.3f} s  ({kept / plain - 1:+.1%})")
+	sys.stdout.flush()
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,70 @@
+import argparse
+import random
+import time
+
+from FortuneTree import Node, FortuneTree
+
+
+# builds a perfectly balanced FortuneTree holding n nodes, without going through the insert path we want to measure
+def BalancedTree(n):
+	nodes = [Node(i) for i in range(n)]
+
+	for a, b in zip(nodes, nodes[1:]):
+		a.next = b
+		b.previous = a
+
+	def Build(lo, hi, parent):
+		if lo > hi:
+			return None
+
+		mid = (lo + hi) // 2
+		node = nodes[mid]
+		node.parent = parent
+		node.left = Build(lo, mid - 1, node)
+		node.right = Build(mid + 1, hi, node)
+		node.height = 1 + max(-1 if node.left == None else node.left.height,
+							  -1 if node.right == None else node.right.height)
+		return node
+
+	return FortuneTree(Build(0, n - 1, None)), nodes
+
+
+# average cost of one InsertAfter/InsertBefore and one Delete at a fixed tree size of roughly n
+def TimeOperations(n, ops, rng):
+	tree, nodes = BalancedTree(n)
+	targets = [nodes[rng.randrange(n)] for _ in range(ops)]
+	newnodes = [Node(n + i) for i in range(ops)]
+
+	start = time.perf_counter()
+	for i in range(ops):
+		if i % 2:
+			tree.InsertAfter(targets[i], newnodes[i])
+		else:
+			tree.InsertBefore(targets[i], newnodes[i])
+	insert_time = (time.perf_counter() - start) / ops
+
+	start = time.perf_counter()
+	for node in newnodes:
+		tree.Delete(node)
+	delete_time = (time.perf_counter() - start) / ops
+
+	return insert_time, delete_time, tree.GetHeight()
+
+
+def main():
+	parser = argparse.ArgumentParser(description="per-operation cost of FortuneTree updates as the tree grows")
+	parser.add_argument("--sizes", type=int, nargs="+", default=[10**3, 10**4, 10**5, 10**6])
+	parser.add_argument("--ops", type=int, default=20000, help="updates timed at each size")
+	parser.add_argument("--seed", type=int, default=0)
+	args = parser.parse_args()
+
+	rng = random.Random(args.seed)
+
+	print(f"{'arcs':>10} {'height':>7} {'insert (us)':>12} {'delete (us)':>12}")
+	for n in args.sizes:
+		insert_time, delete_time, height = TimeOperations(n, args.ops, rng)
+		print(f"{n:>10} {height:>7} {insert_time * 1e6:>12.2f} {delete_time * 1e6:>12.2f}")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,68 @@
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from benchmarks.ParallelScaling import CanonicalEdges
+from FortunesAlgorithm import FortunesAlgorithm
+import SiteGenerator
+
+
+def main():
+	parser = argparse.ArgumentParser(description="keeping a diagram up to date under churn with InsertSite/DeleteSite, against rebuilding it")
+	parser.add_argument("--sites", type=int, default=10**5)
+	parser.add_argument("--churn", type=float, default=0.001, help="fraction of the sites replaced each tick")
+	parser.add_argument("--ticks", type=int, default=10)
+	parser.add_argument("--seed", type=int, default=0)
+	args = parser.parse_args()
+
+	# the churn draws from a stream of its own, as one seeded like the sites' would only add repeats of them
+	rng = np.random.default_rng(args.seed + 1)
+	sites = SiteGenerator.RandomSites(None, args.sites, seed=args.seed)
+
+	start = time.perf_counter()
+	algorithm = FortunesAlgorithm(sites)
+	algorithm.RunAlgorithm()
+	rebuild = time.perf_counter() - start
+	G = algorithm.G
+
+	# each tick removes a random batch of live sites and adds as many new ones
+	changes = max(int(args.sites * args.churn), 1)
+	live = list(range(args.sites))
+	ticks = []
+
+	for tick in range(args.ticks):
+		removed = rng.choice(len(live), changes, replace=False)
+		added = rng.random((changes, 2))
+
+		start = time.perf_counter()
+		for index in np.sort(removed)[::-1]:
+			G.DeleteSite(live[index])
+			live[index] = live[-1]
+			live.pop()
+		for x, y in added.tolist():
+			live.append(G.InsertSite(x, y))
+		ticks.append(time.perf_counter() - start)
+
+	# sweeping the updated diagram's sites again (with the deleted ones left out) should give the same diagram, up to
+	# rounding in its vertices
+	G.Compact()
+	updated = CanonicalEdges(G)
+	algorithm.Restart()
+	algorithm.RunAlgorithm()
+	rebuilt = CanonicalEdges(algorithm.G)
+	matches = updated.shape == rebuilt.shape and np.array_equal(updated[:, :2], rebuilt[:, :2]) and \
+		np.allclose(updated[:, 2:], rebuilt[:, 2:])
+
+	tick = np.median(ticks)
+	print(f"{args.sites} sites, {changes} removed and {changes} added per tick, {args.ticks} ticks")
+	print(f"  rebuild (one sweep)    {rebuild * 1000:>10.1f} ms")
+	print(f"  update (median tick)   {tick * 1000:>10.1f} ms  ({tick / (2 * changes) * 1e6:,.0f} us per site)")
+	print(f"  speedup                {rebuild / tick:>10.1f} x")
+	print(f"  matches a rebuild      {str(matches):>10}")
+	sys.stdout.flush()
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,54 @@
+import argparse
+import sys
+
+from benchmarks import Best
+from FortunesAlgorithm import FortunesAlgorithm
+import Instrumentation
+import SiteGenerator
+
+
+
+def main():
+	parser = argparse.ArgumentParser(description="cost of Instrumentation, enabled and after disabling, against a sweep that never used it")
+	parser.add_argument("--sites", type=int, default=10**5)
+	parser.add_argument("--repeat", type=int, default=3)
+	parser.add_argument("--seed", type=int, default=0)
+	parser.add_argument("--json", action="store_true", help="print the report as json")
+	args = parser.parse_args()
+
+	sites = SiteGenerator.RandomSites(None, args.sites, seed=args.seed)
+
+	def Sweep():
+		FortunesAlgorithm(sites).RunAlgorithm()
+
+	never = Best(Sweep, args.repeat)
+	methods = [(cls, name, cls.__dict__[name]) for cls, name, wrapper in Instrumentation.Wrappers()]
+
+	Instrumentation.Enable()
+	Instrumentation.Reset()
+	FortunesAlgorithm(sites).RunAlgorithm()
+	report = Instrumentation.Report()
+	enabled = Best(Sweep, args.repeat)
+	Instrumentation.Disable()
+
+	disabled = Best(Sweep, args.repeat)
+	restored = all(cls.__dict__[name] is method for cls, name, method in methods)
+
+	print(f"{args.sites} sites, best of {args.repeat}")
+	print(f"  never enabled     {never:>8.3f} s")
+	print(f"  disabled again    {disabled:>8.3f} s  ({disabled / never - 1:+.1%})")
+	print(f"  enabled           {enabled:>8.3f} s  ({enabled / never - 1:+.1%})")
+	print(f"  original methods restored by Disable(): {restored}")
+
+	if args.json:
+		print(Instrumentation.Json(indent=2))
+	else:
+		for group in ["counters", "timers"]:
+			print(f"{group} (one sweep):")
+			for name, value in report[group].items():
+				print(f"  {name:<24} {value:>14,.3f}" if isinstance(value, float) else f"  {name:<24} {value:>14,}")
+	sys.stdout.flush()
+
+
+if __name__ == "__main__":
+	main()
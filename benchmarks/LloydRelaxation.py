@@ -0,0 +1,63 @@
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from benchmarks import Best
+from Boundary import RectangularBoundary
+from FortunesAlgorithm import FortunesAlgorithm
+from Relaxation import LloydRelaxation
+import SiteGenerator
+
+
+# one relaxation step the long way round, building everything afresh
+def RebuildStep(sites, boundary):
+	algorithm = FortunesAlgorithm(sites, boundary)
+	algorithm.RunAlgorithm()
+	area, centroid = algorithm.G.Centroids()
+	return np.where((area > 0)[:, None], centroid, sites)
+
+
+
+def main():
+	parser = argparse.ArgumentParser(description="time per step of lloyd relaxation with LloydRelaxation, against rebuilding everything each step")
+	parser.add_argument("--sites", type=int, default=10**4)
+	parser.add_argument("--iterations", type=int, default=20)
+	parser.add_argument("--tolerance", type=float, default=1e-6)
+	parser.add_argument("--seed", type=int, default=0)
+	args = parser.parse_args()
+
+	boundary = RectangularBoundary()
+	sites = SiteGenerator.RandomSites(boundary, args.sites, seed=args.seed)
+
+	relaxation = LloydRelaxation(sites, boundary)
+	print(f"{args.sites} sites in the unit square")
+	print(f"{'step':>5} {'time (s)':>10} {'max move':>12} {'total area':>11}")
+	for step in range(1, args.iterations + 1):
+		move = relaxation.Step()
+		area, centroid = relaxation.G.Centroids()
+		print(f"{step:>5} {relaxation.step_times[-1]:>10.3f} {move:>12.3e} {area.sum():>11.6f}")
+		sys.stdout.flush()
+		if move < args.tolerance:
+			break
+
+	start = time.perf_counter()
+	for step in range(3):
+		sites = RebuildStep(sites, boundary)
+	rebuild = (time.perf_counter() - start) / 3
+
+	# getting a sweep ready: what reuse saves, as the sweep itself does the same work either way
+	setup_reuse = Best(lambda: relaxation.algorithm.Restart(relaxation.sites), 5)
+	setup_rebuild = Best(lambda: FortunesAlgorithm(relaxation.sites, boundary), 5)
+
+	reuse = np.median(relaxation.step_times)
+	print(f"  median step, reusing   {reuse:>10.3f} s")
+	print(f"  step, rebuilding       {rebuild:>10.3f} s")
+	print(f"  setup, reusing         {setup_reuse * 1e3:>10.2f} ms")
+	print(f"  setup, rebuilding      {setup_rebuild * 1e3:>10.2f} ms  ({setup_rebuild / setup_reuse:.1f}x, "
+		  f"{(setup_rebuild - setup_reuse) / reuse:.1%} of a step)")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,63 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+from FortunesAlgorithm import FortunesAlgorithm
+from ParallelSweep import ParallelVoronoiDiagram
+import SiteGenerator
+
+
+# the edges of a diagram as rows of (lower face, higher face, the ends' coordinates, from the lower face's side), sorted,
+# which two diagrams of the same sites share exactly if they are the same up to the numbering of vertices and edges
+def CanonicalEdges(G):
+	origin, twin, next, prev, face = G.Halfedges()
+	vertex_xy = np.append(G.Vertices(), [[np.inf, np.inf]], axis=0)
+
+	swap = face[0::2] > face[1::2]
+	first = np.where(swap, 1, 0) + np.arange(0, len(origin), 2)
+	rows = np.column_stack([face[first], face[first ^ 1], vertex_xy[origin[first]], vertex_xy[origin[first ^ 1]]])
+	return rows[np.lexsort(rows.T[::-1])]
+
+
+def main():
+	parser = argparse.ArgumentParser(description="strip-parallel construction with ParallelVoronoiDiagram, against a single sweep")
+	parser.add_argument("--sites", type=int, default=10**6)
+	parser.add_argument("--processes", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+	parser.add_argument("--repeats", type=int, default=50, help="extra copies of randomly chosen sites, which both constructions should leave with empty faces")
+	parser.add_argument("--no-baseline", action="store_true", help="skip the single sweep (and the check against it)")
+	parser.add_argument("--seed", type=int, default=0)
+	args = parser.parse_args()
+
+	sites = SiteGenerator.RandomSites(None, args.sites, seed=args.seed)
+	sites = np.concatenate([sites, sites[np.random.default_rng(args.seed).integers(0, args.sites, args.repeats)]])
+	print(f"{args.sites} sites (and {args.repeats} repeats), {os.cpu_count()} cpus")
+
+	baseline = None
+	if not args.no_baseline:
+		start = time.perf_counter()
+		algorithm = FortunesAlgorithm(sites)
+		algorithm.RunAlgorithm()
+		single = time.perf_counter() - start
+		baseline = CanonicalEdges(algorithm.G)
+		del algorithm
+		print(f"  single sweep {single:>10.2f} s")
+
+	print(f"{'processes':>10} {'time (s)':>10} {'speedup':>8} {'matches':>8}")
+	for processes in args.processes:
+		start = time.perf_counter()
+		G = ParallelVoronoiDiagram(sites, processes=processes)
+		elapsed = time.perf_counter() - start
+
+		if baseline is None:
+			print(f"{processes:>10} {elapsed:>10.2f}")
+		else:
+			matches = np.array_equal(CanonicalEdges(G), baseline)
+			print(f"{processes:>10} {elapsed:>10.2f} {single / elapsed:>8.2f} {str(matches):>8}")
+		sys.stdout.flush()
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,66 @@
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from FortunesAlgorithm import FortunesAlgorithm
+from PointLocation import PointLocator
+import SiteGenerator
+
+
+# the nearest site to each query point by checking every site, a chunk of queries at a time
+def BruteForce(sites, points, chunk_size=256):
+	nearest = np.empty(len(points), dtype=np.int64)
+
+	for begin in range(0, len(points), chunk_size):
+		chunk = points[begin:begin + chunk_size]
+		distance = (chunk[:, None, 0] - sites[None, :, 0])**2 + (chunk[:, None, 1] - sites[None, :, 1])**2
+		nearest[begin:begin + chunk_size] = distance.argmin(axis=1)
+
+	return nearest
+
+
+def main():
+	parser = argparse.ArgumentParser(description="bulk point location with PointLocator, against brute-force nearest-site search")
+	parser.add_argument("--sites", type=int, default=10**5)
+	parser.add_argument("--queries", type=int, default=10**7)
+	parser.add_argument("--brute-force-queries", type=int, default=1000, help="brute force is timed on this many queries, and scaled up")
+	parser.add_argument("--seed", type=int, default=0)
+	args = parser.parse_args()
+
+	rng = np.random.default_rng(args.seed)
+	sites = SiteGenerator.RandomSites(None, args.sites, seed=args.seed)
+	points = rng.random((args.queries, 2))
+
+	algorithm = FortunesAlgorithm(sites)
+	algorithm.RunAlgorithm()
+
+	start = time.perf_counter()
+	locator = PointLocator(algorithm.G)
+	build = time.perf_counter() - start
+
+	start = time.perf_counter()
+	faces = locator.LocateAll(points)
+	locate = time.perf_counter() - start
+
+	sample = points[:args.brute_force_queries]
+	start = time.perf_counter()
+	nearest = BruteForce(sites, sample)
+	brute_force = (time.perf_counter() - start) * args.queries / len(sample)
+
+	# ties aside, both should find a nearest site
+	distance = lambda ids: ((sample - sites[ids])**2).sum(axis=1)
+	agree = np.mean(distance(faces[:len(sample)]) == distance(nearest))
+
+	print(f"{args.sites} sites, {args.queries} queries")
+	print(f"  index build            {build:>10.3f} s")
+	print(f"  PointLocator.LocateAll {locate:>10.3f} s  ({args.queries / locate:,.0f} queries/s)")
+	print(f"  brute force (scaled)   {brute_force:>10.1f} s  ({args.queries / brute_force:,.0f} queries/s)")
+	print(f"  speedup                {brute_force / locate:>10.0f} x")
+	print(f"  agreement on sample    {agree:>10.2%}")
+	sys.stdout.flush()
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,85 @@
+import argparse
+import sys
+
+import numpy as np
+
+from benchmarks import Best
+from benchmarks.Suite import Sites
+from FortunesAlgorithm import FortunesAlgorithm
+import Instrumentation
+import Predicates
+
+
+# the predicates with their filters taken out, i.e. the plain floating point tests they stand in for
+def PlainOrientation(a, b, c):
+	return Predicates.Sign((a.x - c.x) * (b.y - c.y) - (a.y - c.y) * (b.x - c.x))
+
+def PlainMidpointSide(x, x1, x2):
+	return Predicates.Sign(2 * x - x1 - x2)
+
+def PlainQuadraticSign(x, x1, y1, x2, y2, directrix):
+	h1 = y1 - directrix
+	h2 = y2 - directrix
+	return Predicates.Sign(h2 * (x - x1)**2 - h1 * (x - x2)**2 + h1 * h2 * (y1 - y2))
+
+def PlainVertexSign(x, x1, y1, x2, y2, directrix):
+	V = x * (y2 - y1) - (y2 - directrix) * x1 + (y1 - directrix) * x2
+	return Predicates.Sign(V) if y2 > y1 else -Predicates.Sign(V)
+
+PLAIN = {"Orientation": PlainOrientation, "MidpointSide": PlainMidpointSide, "QuadraticSign": PlainQuadraticSign,
+		 "VertexSign": PlainVertexSign}
+
+# n sites as in the suite, or on an exact square grid, where every square of four sites is cocircular and every row
+# and column collinear
+def GridSites(distribution, n, rng):
+	if distribution == "grid":
+		side = int(np.ceil(np.sqrt(n)))
+		return np.stack(np.divmod(np.arange(n), side), axis=1) / side
+
+	return Sites(distribution, n, rng)
+
+
+
+def main():
+	parser = argparse.ArgumentParser(description="how often the sweep's predicates fall back on exact arithmetic, and what their filters cost over plain floating point tests")
+	parser.add_argument("--sites", type=int, nargs="+", default=[10**3, 10**4])
+	parser.add_argument("--distributions", nargs="+", default=["uniform", "lattice", "grid"])
+	parser.add_argument("--repeat", type=int, default=3)
+	parser.add_argument("--seed", type=int, default=0)
+	args = parser.parse_args()
+
+	print(f"{'distribution':<12} {'sites':>7} {'orientations':>13} {'fallbacks':>10} {'breakpoints':>12} {'fallbacks':>10} "
+		  f"{'plain (s)':>10} {'filtered (s)':>13} {'overhead':>9}")
+	for distribution in args.distributions:
+		for n in args.sites:
+			sites = GridSites(distribution, n, np.random.default_rng(args.seed))
+
+			def Sweep():
+				assert FortunesAlgorithm(sites).RunAlgorithm()
+
+			Instrumentation.Enable()
+			Instrumentation.Reset()
+			FortunesAlgorithm(sites).RunAlgorithm()
+			counters = dict(Instrumentation.counters)
+			Instrumentation.Disable()
+
+			filtered = Best(Sweep, args.repeat)
+
+			originals = {name: getattr(Predicates, name) for name in PLAIN}
+			for name, function in PLAIN.items():
+				setattr(Predicates, name, function)
+			try:
+				plain = Best(Sweep, args.repeat)
+			finally:
+				for name, function in originals.items():
+					setattr(Predicates, name, function)
+
+			orientations, breakpoints = counters["orientations"], counters["breakpoint_sides"]
+			print(f"{distribution:<12} {n:>7} {orientations:>13} {counters['orientation_fallbacks'] / max(orientations, 1):>10.2%} "
+				  f"{breakpoints:>12} {counters['breakpoint_fallbacks'] / max(breakpoints, 1):>10.2%} "
+				  f"{plain:>10.3f} {filtered:>13.3f} {filtered / plain - 1:>9.1%}")
+			sys.stdout.flush()
+
+
+if __name__ == "__main__":
+	main()
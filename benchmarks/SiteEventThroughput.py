@@ -0,0 +1,73 @@
+import argparse
+import copy
+import random
+import sys
+import time
+
+from BeachLine import Arc, BeachLine
+from Point import Point
+
+
+# random sites, in the order the sweep meets them (decreasing y)
+def SweepOrderedSites(n, rng):
+	sites = [Point(rng.uniform(-1, 1), rng.uniform(-1, 1)) for _ in range(n)]
+	sites.sort(key=lambda point : -point.y)
+	return sites
+
+
+# the old AddArc, which duplicated the split arc with copy.deepcopy (and so copied every arc reachable from it)
+def DeepcopyAddArc(beachline, arc):
+	left = beachline.GetArcAbove(arc.focus.x, arc.focus.y)
+	right = copy.deepcopy(left)
+
+	# the copy drags along its own parent, children and neighbours, none of which belong in the tree
+	right.parent = right.left = right.right = None
+	right.previous = right.next = None
+	right.height = 0
+
+	beachline.InsertAfter(left, arc)
+	beachline.InsertAfter(arc, right)
+
+
+# site events per second when feeding n sites into a beachline one at a time
+def Throughput(sites, add_arc):
+	beachline = BeachLine(Arc(sites[0]))
+	arcs = [Arc(site) for site in sites[1:]]
+
+	start = time.perf_counter()
+	for arc in arcs:
+		add_arc(beachline, arc)
+	elapsed = time.perf_counter() - start
+
+	return len(arcs) / elapsed
+
+
+def main():
+	parser = argparse.ArgumentParser(description="site event throughput of BeachLine.AddArc, with and without copy.deepcopy")
+	parser.add_argument("--sizes", type=int, nargs="+", default=[100, 300, 1000, 10**4, 10**5])
+	parser.add_argument("--deepcopy-limit", type=int, default=1000, help="largest size to run the quadratic deepcopy version at")
+	parser.add_argument("--seed", type=int, default=0)
+	args = parser.parse_args()
+
+	rng = random.Random(args.seed)
+
+	print(f"{'sites':>8} {'deepcopy (ev/s)':>16} {'split (ev/s)':>14}")
+	for n in args.sizes:
+		sites = SweepOrderedSites(n, rng)
+
+		if n > args.deepcopy_limit:
+			before = f"{'-':>16}"
+		else:
+			try:
+				before = f"{Throughput(sites, DeepcopyAddArc):>16.0f}"
+			except RecursionError:
+				# deepcopy recurses along the next/previous links, so long beachlines can blow the stack
+				before = f"{'RecursionError':>16}"
+
+		after = Throughput(sites, BeachLine.AddArc)
+		print(f"{n:>8} {before} {after:>14.0f}")
+		sys.stdout.flush()
+
+
+if __name__ == "__main__":
+	main()
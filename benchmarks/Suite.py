@@ -0,0 +1,265 @@
+import argparse
+import json
+import math
+import platform
+import random
+import sys
+import time
+
+import numpy as np
+
+from AVLTree import AVLTree
+from benchmarks import Best
+from BeachLine import Arc, BeachLine
+from FortunesAlgorithm import FortunesAlgorithm
+from FortuneTree import FortuneTree, Node
+from Point import Point
+import SiteGenerator
+
+
+# n sites from one of a few distributions, as an (n, 2) array
+def Sites(distribution, n, rng):
+	if distribution == "uniform":
+		return rng.random((n, 2))
+
+	if distribution == "normal":
+		return rng.normal(size=(n, 2))
+
+	# twenty tight gaussian clusters, at uniformly random centres
+	if distribution == "clustered":
+		centres = rng.random((20, 2))
+		return centres[rng.integers(0, 20, n)] + rng.normal(scale=0.02, size=(n, 2))
+
+	# a square grid, jittered just enough to put the sites in general position
+	if distribution == "lattice":
+		side = int(math.ceil(math.sqrt(n)))
+		grid = np.stack(np.divmod(np.arange(n), side), axis=1) / side
+		return grid + rng.uniform(-1e-3, 1e-3, (n, 2)) / side
+
+	if distribution == "poisson":
+		seed = int(rng.integers(2**31))
+		return SiteGenerator.PoissonDiskSites(None, SiteGenerator.PoissonDiskRadius(None, n), seed=seed)
+
+	raise ValueError(f"unknown distribution {distribution}")
+
+DISTRIBUTIONS = ["uniform", "normal", "clustered", "lattice", "poisson"]
+
+# a sweep over the sites stopped halfway (by the number of site events), with its beachline as it is at that point
+def HalfwaySweep(sites):
+	algorithm = FortunesAlgorithm(sites)
+	site_events = 0
+
+	for record in algorithm.Stream():
+		site_events += record.kind == "site"
+		if site_events >= len(sites) // 2:
+			break
+
+	return algorithm.B, algorithm.sweepline
+
+# each benchmark takes the sites, a repeat count and a random.Random, and returns a dict of metrics: those ending in
+# _time are seconds (per operation, where there are several), and are what comparisons check for regressions
+# the sites' x values go into a FortuneTree from the top down, as in the sweep, each next to its neighbours in x (found
+# by descending the tree), and come out again in the same order, so the shape of the tree follows the distribution
+def FortuneTreeBenchmark(sites, repeat, rng):
+	order = np.lexsort((sites[:, 0], -sites[:, 1]))
+	values = sites[order, 0].tolist()
+	insert, delete = math.inf, math.inf
+
+	for _ in range(repeat):
+		tree = FortuneTree(None)
+		nodes = [Node(value) for value in values]
+
+		start = time.perf_counter()
+		for node in nodes:
+			above = tree.root
+			while above != None:
+				child = above.left if node.data < above.data else above.right
+				if child == None:
+					break
+				above = child
+
+			if above == None:
+				tree.root = node
+			elif node.data < above.data:
+				tree.InsertBefore(above, node)
+			else:
+				tree.InsertAfter(above, node)
+		insert = min(insert, (time.perf_counter() - start) / len(nodes))
+		height = tree.GetHeight()
+
+		start = time.perf_counter()
+		for node in nodes:
+			tree.Delete(node)
+		delete = min(delete, (time.perf_counter() - start) / len(nodes))
+
+	return {"insert_time": insert, "delete_time": delete, "height": height}
+
+def AVLTreeBenchmark(sites, repeat, rng):
+	values = sites[:, 0].tolist()
+	probes = [rng.choice(values) for _ in range(2000)]
+	insert, search, delete = math.inf, math.inf, math.inf
+
+	for _ in range(repeat):
+		tree = AVLTree()
+
+		start = time.perf_counter()
+		for value in values:
+			tree.insert(value)
+		insert = min(insert, (time.perf_counter() - start) / len(values))
+		height = tree.get_height(tree.root)
+
+		start = time.perf_counter()
+		for value in probes:
+			tree.search(value)
+		search = min(search, (time.perf_counter() - start) / len(probes))
+
+		start = time.perf_counter()
+		for value in values:
+			tree.delete(value)
+		delete = min(delete, (time.perf_counter() - start) / len(values))
+
+	return {"insert_time": insert, "search_time": search, "delete_time": delete, "height": height}
+
+def ArcSearchBenchmark(sites, repeat, rng):
+	beachline, sweepline = HalfwaySweep(sites)
+	# plain python floats, as in the sweep, rather than numpy scalars
+	left, right = sites[:, 0].min().item(), sites[:, 0].max().item()
+	X = [rng.uniform(left, right) for _ in range(2000)]
+
+	def Search():
+		for x in X:
+			beachline.GetArcAbove(x, sweepline)
+
+	return {"query_time": Best(Search, repeat) / len(X), "arcs": beachline.arc_count, "height": beachline.GetHeight()}
+
+def EnvelopeBenchmark(sites, repeat, rng):
+	beachline, sweepline = HalfwaySweep(sites)
+	left, right = sites[:, 0].min(), sites[:, 0].max()
+	sample = lambda: beachline.SampleEnvelope(sweepline, left, right, samples=1000)
+	return {"sample_time": Best(sample, repeat), "arcs": beachline.arc_count}
+
+def SweepBenchmark(sites, repeat, rng):
+	sweep = Best(lambda: FortunesAlgorithm(sites).RunAlgorithm(), repeat)
+	return {"sweep_time": sweep, "site_time": sweep / len(sites)}
+
+BENCHMARKS = {
+	"fortune_tree": FortuneTreeBenchmark,
+	"avl_tree": AVLTreeBenchmark,
+	"arc_search": ArcSearchBenchmark,
+	"envelope": EnvelopeBenchmark,
+	"sweep": SweepBenchmark,
+}
+
+# every benchmark at every size, over every distribution, as a list of result records
+def Run(benchmarks, distributions, sizes, repeat, seed):
+	records = []
+
+	for name in benchmarks:
+		for distribution in distributions:
+			for n in sizes:
+				rng = random.Random(seed)
+				sites = Sites(distribution, n, np.random.default_rng(seed))
+				metrics = BENCHMARKS[name](sites, repeat, rng)
+				records.append({"benchmark": name, "distribution": distribution, "n": n, "metrics": metrics})
+				Print(records[-1])
+
+	return records
+
+def Print(record, flags=()):
+	metrics = "  ".join(f"{key}={value * 1e6:.2f}us" if key.endswith("_time") else f"{key}={value}"
+						for key, value in record["metrics"].items())
+	print(f"{record['benchmark']:<13} {record['distribution']:<10} {record['n']:>8}  {metrics}{''.join(flags)}")
+	sys.stdout.flush()
+
+# the records' timings set against a baseline's (matched by benchmark, distribution and n), returning the regressions:
+# (record, metric, ratio) for every time more than threshold (as a fraction) slower than the baseline's
+def Compare(records, baseline, threshold):
+	previous = {(record["benchmark"], record["distribution"], record["n"]): record for record in baseline["results"]}
+	regressions = []
+
+	for record in records:
+		before = previous.get((record["benchmark"], record["distribution"], record["n"]))
+		if before == None:
+			continue
+
+		for key, value in record["metrics"].items():
+			if key.endswith("_time") and key in before["metrics"] and before["metrics"][key] > 0:
+				ratio = value / before["metrics"][key]
+				if ratio > 1 + threshold:
+					regressions.append((record, key, ratio))
+
+	return regressions
+
+# regenerate the plots in pyplot_outputs: the average height of AVL trees built by random insertion, as they grow, and
+# the time taken by successive calls of BeachLine.PlotEnvelope
+def Plot(seed):
+	from matplotlib import pyplot as plt
+
+	rng = random.Random(seed)
+	max_nodes, trees = 400, 100
+	heights = np.zeros(max_nodes)
+	for _ in range(trees):
+		tree = AVLTree()
+		for i in range(max_nodes):
+			tree.insert(rng.random())
+			heights[i] += tree.get_height(tree.root)
+
+	plt.plot(np.arange(1, max_nodes + 1), heights / trees)
+	plt.title(f"Average height of AVL trees ({trees} trees per data point)")
+	plt.xlabel("Number of nodes")
+	plt.ylabel("Average tree height")
+	plt.savefig("pyplot_outputs/ave_heights.png")
+	plt.clf()
+
+	beachline = BeachLine(Arc(Point(-1, 3)))
+	beachline.AddArc(Arc(Point(2, 2)))
+	beachline.AddArc(Arc(Point(-4, 1)))
+	timings = []
+	for _ in range(50):
+		start = time.perf_counter()
+		beachline.PlotEnvelope(0, -10, 10, 1000, show=False)
+		timings.append(time.perf_counter() - start)
+
+	plt.plot(timings)
+	plt.xlabel("Call")
+	plt.ylabel("BeachLine.PlotEnvelope time (s)")
+	plt.savefig("pyplot_outputs/plotenvelope_timing.png")
+	plt.clf()
+
+
+def main():
+	parser = argparse.ArgumentParser(prog="python -m benchmarks", description="the benchmark suite: timings of the trees, "
+									 "beachline and full sweep, over sizes and site distributions, saved as json and compared against a baseline")
+	parser.add_argument("--benchmarks", nargs="+", choices=list(BENCHMARKS), default=list(BENCHMARKS))
+	parser.add_argument("--distributions", nargs="+", choices=DISTRIBUTIONS, default=["uniform"])
+	parser.add_argument("--sizes", type=int, nargs="+", default=[10**3, 10**4])
+	parser.add_argument("--repeat", type=int, default=3)
+	parser.add_argument("--seed", type=int, default=0)
+	parser.add_argument("--output", help="save the results to this json file (e.g. to serve as a baseline)")
+	parser.add_argument("--compare", help="a json file of earlier results, to flag regressions against")
+	parser.add_argument("--threshold", type=float, default=0.2, help="slowdown (as a fraction) counted as a regression")
+	parser.add_argument("--plot", action="store_true", help="regenerate the plots in pyplot_outputs, and nothing else")
+	args = parser.parse_args()
+
+	if args.plot:
+		Plot(args.seed)
+		return
+
+	records = Run(args.benchmarks, args.distributions, args.sizes, args.repeat, args.seed)
+
+	if args.output:
+		meta = {"python": platform.python_version(), "numpy": np.__version__, "machine": platform.machine(),
+				"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "arguments": sys.argv[1:]}
+		with open(args.output, "w") as file:
+			json.dump({"meta": meta, "results": records}, file, indent=1)
+
+	if args.compare:
+		with open(args.compare) as file:
+			regressions = Compare(records, json.load(file), args.threshold)
+
+		for record, key, ratio in regressions:
+			print(f"REGRESSION {record['benchmark']} {record['distribution']} n={record['n']} {key}: {ratio:.2f}x the baseline")
+		print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}")
+
+		if regressions:
+			sys.exit(1)
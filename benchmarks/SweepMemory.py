@@ -0,0 +1,49 @@
+import argparse
+import random
+import sys
+import tracemalloc
+
+import AVLTree
+from BeachLine import Arc
+from FortuneTree import Node
+from FortunesAlgorithm import FortunesAlgorithm
+from Point import Point
+
+
+# peak and retained memory of a full run over n random sites, in bytes per site (the input sites themselves excluded)
+def SweepMemory(n, rng):
+	sites = [Point(rng.random(), rng.random()) for _ in range(n)]
+
+	tracemalloc.start()
+	algorithm = FortunesAlgorithm(sites)
+	algorithm.RunAlgorithm()
+	diagram = algorithm.G
+	del algorithm
+	retained, peak = tracemalloc.get_traced_memory()
+	tracemalloc.stop()
+
+	return peak / n, retained / n, diagram.Nbytes() / n
+
+
+def main():
+	parser = argparse.ArgumentParser(description="memory used per site by a full run of Fortune's algorithm, measured with tracemalloc")
+	parser.add_argument("--sizes", type=int, nargs="+", default=[10**3, 10**4, 10**5])
+	parser.add_argument("--seed", type=int, default=0)
+	args = parser.parse_args()
+
+	rng = random.Random(args.seed)
+
+	print("object sizes (bytes):")
+	for name, instance in [("Point", Point(0.0, 0.0)), ("FortuneTree.Node", Node()),
+						   ("BeachLine.Arc", Arc(Point(0.0, 0.0))), ("AVLTree.Node", AVLTree.Node(0))]:
+		print(f"  {name:<17} {sys.getsizeof(instance):>4}")
+
+	print(f"{'sites':>9} {'peak (B/site)':>14} {'retained (B/site)':>18} {'DCEL arrays (B/site)':>21}")
+	for n in args.sizes:
+		peak, retained, arrays = SweepMemory(n, rng)
+		print(f"{n:>9} {peak:>14.1f} {retained:>18.1f} {arrays:>21.1f}")
+		sys.stdout.flush()
+
+
+if __name__ == "__main__":
+	main()
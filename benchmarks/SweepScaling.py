@@ -0,0 +1,60 @@
+import argparse
+import math
+import random
+import sys
+
+from benchmarks import Best
+from FortunesAlgorithm import FortunesAlgorithm
+from Point import Point
+
+
+def RandomSites(n, rng):
+	return [Point(rng.random(), rng.random()) for _ in range(n)]
+
+
+# wall time of a full sweep (construction included) over n uniformly random sites, best of several runs
+def TimeSweep(n, repeat, rng):
+	return Best(lambda sites: FortunesAlgorithm(sites).RunAlgorithm(), repeat, lambda: RandomSites(n, rng))
+
+
+# least-squares fit of log(t) = log(c) + k log(n), returning the growth exponent k
+def GrowthExponent(sizes, times):
+	X = [math.log(n) for n in sizes]
+	Y = [math.log(t) for t in times]
+	mean_x = sum(X) / len(X)
+	mean_y = sum(Y) / len(Y)
+
+	return sum((x - mean_x) * (y - mean_y) for x, y in zip(X, Y)) / sum((x - mean_x)**2 for x in X)
+
+
+def main():
+	parser = argparse.ArgumentParser(description="fits the growth of full sweep time with n, failing if it looks worse than n log n")
+	parser.add_argument("--sizes", type=int, nargs="+", default=[10**3, 10**4, 10**5], help="add 1000000 for the full-scale check")
+	parser.add_argument("--repeat", type=int, default=1)
+	parser.add_argument("--max-exponent", type=float, default=1.25, help="n log n fits around 1.1 over these sizes, quadratic fits 2")
+	parser.add_argument("--seed", type=int, default=0)
+	args = parser.parse_args()
+
+	rng = random.Random(args.seed)
+	times = []
+
+	print(f"{'sites':>9} {'time (s)':>10} {'us/site':>9} {'ns/(n log2 n)':>14}")
+	for n in args.sizes:
+		t = TimeSweep(n, args.repeat, rng)
+		times.append(t)
+		print(f"{n:>9} {t:>10.3f} {t / n * 1e6:>9.2f} {t / (n * math.log2(n)) * 1e9:>14.1f}")
+		sys.stdout.flush()
+
+	if len(args.sizes) < 2:
+		return
+
+	exponent = GrowthExponent(args.sizes, times)
+	print(f"fitted growth: time ~ n^{exponent:.3f}")
+
+	if exponent > args.max_exponent:
+		print(f"REGRESSION: growth exponent exceeds {args.max_exponent}")
+		sys.exit(1)
+
+
+if __name__ == "__main__":
+	main()
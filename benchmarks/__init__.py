@@ -0,0 +1,17 @@
+# timing and memory benchmarks, run from the repository root e.g. `python -m benchmarks.FortuneTreeScaling`, or all of the
+# main ones together with `python -m benchmarks`
+import math
+import time
+
+
+# best wall time of repeat calls of fn(), or with setup, of fn(setup()) with the calls of setup left out of the timing
+def Best(fn, repeat, setup=None):
+	best = math.inf
+
+	for _ in range(repeat):
+		argument = setup() if setup != None else None
+		start = time.perf_counter()
+		fn(argument) if setup != None else fn()
+		best = min(best, time.perf_counter() - start)
+
+	return best
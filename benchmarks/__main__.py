@@ -0,0 +1,5 @@
+# the whole benchmark suite from one command, e.g. `python -m benchmarks --sizes 1000 10000 --output baseline.json`,
+# then `python -m benchmarks --compare baseline.json` (see benchmarks/Suite.py, and --help)
+from benchmarks.Suite import main
+
+main()
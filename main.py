@@ -2,7 +2,7 @@
 import SiteGenerator
 from FortunesAlgorithm import FortunesAlgorithm
 
-# sites = SiteGenerator.RandomSites(None)
+# sites = SiteGenerator.RandomSites(None, 1000, seed=0)
 # algo = FortunesAlgorithm(sites)
 
 # if not algo.RunAlgorithm():